@@ -0,0 +1,144 @@
+from __future__ import annotations
+import atexit
+import os
+import queue
+import shutil
+import threading
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from ai.param_store import ParamStore, write_manifest
+from ai.results_store import ResultsStore
+
+
+class GenerationSnapshot(NamedTuple):
+    """Everything save_latest_gen writes, copied so training can move on."""
+
+    gen_number: int
+    weights: tuple[list[np.ndarray], ...]
+    summary: pd.DataFrame
+    parents: Optional[tuple[tuple[int, int], ...]]
+    # Name of the optimizer that made this generation and its state
+    # (Optimizer.get_state), so training can resume where it left off.
+    optimizer: Optional[str] = None
+    optimizer_state: Optional[dict] = None
+
+
+def write_generation(
+    data_dir: str,
+    snapshot: GenerationSnapshot,
+    results_store: ResultsStore,
+    param_store: ParamStore,
+) -> None:
+    """
+    Write a generation to data_dir/genNNNN: weights go to the param store,
+    and the directory gets a manifest of their keys plus the summary (and
+    optimizer.npz, if the optimizer has state to carry over).  The
+    directory is written to a temporary one first and renamed into place at
+    the end, so a crash never leaves a half written generation behind for
+    load_latest_gen to find.  Writing a generation again (e.g. training on
+    after load_gen) deletes every later one, on disk and in the results
+    store, since they came from the version being replaced.
+    """
+    name = "gen%04d" % snapshot.gen_number
+    save_dir = os.path.join(data_dir, name)
+    tmp_dir = os.path.join(data_dir, "." + name + ".tmp")
+
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    os.makedirs(tmp_dir)
+
+    write_manifest(tmp_dir, param_store.put_generation(snapshot.weights))
+    snapshot.summary.to_csv(os.path.join(tmp_dir, "summary.csv"), index=False)
+    if snapshot.optimizer_state:
+        np.savez(
+            os.path.join(tmp_dir, "optimizer.npz"),
+            optimizer=snapshot.optimizer,
+            **snapshot.optimizer_state,
+        )
+
+    if os.path.exists(save_dir):
+        # Directories can't be renamed over, so move the old one aside.
+        old_dir = os.path.join(data_dir, "." + name + ".old")
+        os.replace(save_dir, old_dir)
+        os.replace(tmp_dir, save_dir)
+        shutil.rmtree(old_dir)
+    else:
+        os.replace(tmp_dir, save_dir)
+
+    for later in os.listdir(data_dir):
+        if later.startswith("gen") and int(later[3:]) > snapshot.gen_number:
+            shutil.rmtree(os.path.join(data_dir, later))
+
+    results_store.append_generation(
+        snapshot.gen_number, snapshot.summary, snapshot.parents
+    )
+
+
+class CheckpointWriter(threading.Thread):
+    """
+    This class writes generation snapshots on a background thread while the
+    next generation is bred and evaluated.  At most max_pending snapshots
+    wait to be written; past that, submit blocks so memory stays bounded.
+    Anything still queued is written before the interpreter exits.
+    """
+
+    def __init__(
+        self,
+        data_dir: str,
+        results_store: ResultsStore,
+        param_store: ParamStore,
+        max_pending: int = 2,
+    ) -> None:
+        super().__init__(daemon=True)
+
+        self.data_dir = data_dir
+        self.results_store = results_store
+        self.param_store = param_store
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._closed = False
+
+        self.start()
+        atexit.register(self.close)
+
+    def submit(self, snapshot: GenerationSnapshot) -> None:
+        self._raise_error()
+        self._queue.put(snapshot)
+
+    def flush(self) -> None:
+        """Block until everything submitted so far is on disk."""
+        self._queue.join()
+        self._raise_error()
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self.join()
+        atexit.unregister(self.close)
+        self._raise_error()
+
+    def run(self) -> None:
+        while True:
+            snapshot = self._queue.get()
+            try:
+                if snapshot is None:
+                    return
+                if self._error is None:
+                    write_generation(
+                        self.data_dir, snapshot, self.results_store, self.param_store
+                    )
+            except Exception as e:
+                # Hand the error to the training thread on its next call.
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError("Saving a generation failed.") from error
@@ -0,0 +1,239 @@
+from __future__ import annotations
+import pickle
+import queue
+import socket
+import struct
+import threading
+from time import sleep
+from typing import Any, Callable, Optional
+
+from config.init_config import InitConfig
+
+# Every message is a pickled python object preceded by its length as an
+# unsigned 64 bit big-endian integer.  Pickle means both ends must trust each
+# other, so only run this on a private network.
+_HEADER = struct.Struct(">Q")
+
+
+def send_message(sock: socket.socket, obj: Any) -> None:
+    payload = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    sock.sendall(_HEADER.pack(len(payload)) + payload)
+
+
+def recv_message(sock: socket.socket) -> Any:
+    (length,) = _HEADER.unpack(_recv_exact(sock, _HEADER.size))
+    return pickle.loads(_recv_exact(sock, length))
+
+
+def _recv_exact(sock: socket.socket, num_bytes: int) -> bytes:
+    """
+    Expects: a connected socket and a number of bytes to read.
+    Returns: exactly that many bytes.  Raises EOFError if the peer hangs up.
+    """
+    chunks = []
+    while num_bytes > 0:
+        chunk = sock.recv(min(num_bytes, 1 << 20))
+        if not chunk:
+            raise EOFError("Connection closed by peer.")
+        chunks.append(chunk)
+        num_bytes -= len(chunk)
+    return b"".join(chunks)
+
+
+class Coordinator(InitConfig):
+    """
+    This class hands batches of evaluation tasks to remote workers over TCP
+    and gathers their results.  Workers connect whenever they like and stay
+    connected across generations.  A batch whose worker dies or times out is
+    put back in the queue and handed to someone else.
+    """
+
+    def __init__(self, host: str = "0.0.0.0", port: int = 0) -> None:
+        super().__init__()
+
+        self._server = socket.create_server((host, port))
+        self.address = self._server.getsockname()[:2]
+
+        # Batches waiting for a worker, as (batch_id, tasks, attempts).
+        self._pending = queue.Queue()
+        # batch_id -> list of results, or None if the batch gave up.
+        self._finished = {}
+        self._done = threading.Condition()
+        self._next_batch_id = 0
+
+        self._connections = []
+        self._closing = False
+        self._accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self._accept_thread.start()
+
+    @property
+    def num_workers(self) -> int:
+        return len(self._connections)
+
+    def wait_for_workers(self, num_workers: int, timeout: float = None) -> bool:
+        """
+        Block until at least num_workers are connected.
+        Returns: False if we timed out first.
+        """
+        with self._done:
+            return self._done.wait_for(
+                lambda: self.num_workers >= num_workers, timeout=timeout
+            )
+
+    def evaluate(self, tasks: list) -> list:
+        """
+        Expects: list of picklable tasks (e.g. player index, seed, weights).
+        Returns: list of worker results in the same order as tasks.
+        """
+        batch_ids = []
+        for start in range(0, len(tasks), self.eval_batch_size):
+            with self._done:
+                batch_id = self._next_batch_id
+                self._next_batch_id += 1
+            batch_ids.append(batch_id)
+            self._pending.put(
+                (batch_id, tasks[start : start + self.eval_batch_size], 0)
+            )
+
+        if self.num_workers == 0:
+            print("No workers connected yet, waiting for some to connect.")
+        with self._done:
+            # Nothing can time out a batch nobody has picked up, so say so
+            # rather than block silently when every worker is gone.
+            while not self._done.wait_for(
+                lambda: all(b in self._finished for b in batch_ids),
+                timeout=self.worker_timeout,
+            ):
+                num_left = sum(b not in self._finished for b in batch_ids)
+                print(
+                    f"Still waiting on {num_left} batches "
+                    f"with {self.num_workers} workers connected."
+                )
+            batches = [self._finished.pop(b) for b in batch_ids]
+
+        if any(batch is None for batch in batches):
+            raise RuntimeError(
+                "Gave up on a batch after %d attempts." % self.max_batch_attempts
+            )
+
+        return [result for batch in batches for result in batch]
+
+    def close(self) -> None:
+        """Tell all workers to stop and shut down the server."""
+        self._closing = True
+        self._server.close()
+        for conn in list(self._connections):
+            try:
+                send_message(conn, ("shutdown",))
+            except OSError:
+                pass
+
+    def _accept_loop(self) -> None:
+        while not self._closing:
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            threading.Thread(
+                target=self._serve_worker, args=(conn,), daemon=True
+            ).start()
+
+    def _serve_worker(self, conn: socket.socket) -> None:
+        """Feed batches to one worker until it dies or we close."""
+        conn.settimeout(self.worker_timeout)
+        try:
+            recv_message(conn)  # Worker says hello when it is ready.
+        except (OSError, EOFError):
+            conn.close()
+            return
+        with self._done:
+            self._connections.append(conn)
+            self._done.notify_all()
+
+        while not self._closing:
+            try:
+                batch_id, tasks, attempts = self._pending.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+            try:
+                send_message(conn, ("batch", batch_id, tasks))
+                _, result_id, results = recv_message(conn)
+            except (OSError, EOFError):
+                # Worker is dead (or hung).  Hand its batch to someone else.
+                self._requeue(batch_id, tasks, attempts + 1)
+                break
+
+            with self._done:
+                if result_id == batch_id:
+                    self._finished[batch_id] = results
+                self._done.notify_all()
+
+        self._connections.remove(conn)
+        conn.close()
+
+    def _requeue(self, batch_id: int, tasks: list, attempts: int) -> None:
+        if attempts < self.max_batch_attempts:
+            print(f"Lost batch {batch_id}, reassigning (attempt {attempts + 1}).")
+            self._pending.put((batch_id, tasks, attempts))
+        else:
+            with self._done:
+                self._finished[batch_id] = None
+                self._done.notify_all()
+
+
+def run_worker(
+    host: str,
+    port: int,
+    evaluate: Callable[[Any], Any],
+    connect_timeout: Optional[float] = None,
+) -> None:
+    """
+    Connect to a Coordinator and evaluate batches until told to stop.
+    Keeps retrying the connection until connect_timeout seconds have passed
+    (forever if None), so workers can be started before the coordinator.
+    If the connection drops (e.g. the coordinator gave up waiting on a slow
+    batch), connect again and carry on.
+    """
+    sock = _connect(host, port, connect_timeout)
+    while True:
+        with sock:
+            if _serve_coordinator(sock, evaluate):
+                return
+
+        print("Lost the coordinator, reconnecting.")
+        try:
+            sock = _connect(host, port, connect_timeout)
+        except OSError:
+            # The coordinator is gone for good.
+            return
+
+
+def _connect(host: str, port: int, connect_timeout: Optional[float]) -> socket.socket:
+    waited = 0.0
+    while True:
+        try:
+            return socket.create_connection((host, port))
+        except OSError:
+            if connect_timeout is not None and waited >= connect_timeout:
+                raise
+            sleep(0.5)
+            waited += 0.5
+
+
+def _serve_coordinator(sock: socket.socket, evaluate: Callable[[Any], Any]) -> bool:
+    """
+    Evaluate batches over one connection.
+    Returns: True if told to shut down, False if the connection dropped.
+    """
+    try:
+        send_message(sock, ("ready",))
+        while True:
+            message = recv_message(sock)
+            if message[0] == "shutdown":
+                return True
+
+            _, batch_id, tasks = message
+            send_message(sock, ("results", batch_id, [evaluate(t) for t in tasks]))
+    except (OSError, EOFError):
+        return False
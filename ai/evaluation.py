@@ -0,0 +1,35 @@
+from __future__ import annotations
+from time import perf_counter
+
+import numpy as np
+
+from ai.player import Player
+from game.backends import make_game_state
+
+# Everything run inside evaluation workers (pool processes and remote
+# workers) lives here.  Keep the imports down to numpy and the game: every
+# spawned worker pays for them at startup.
+
+
+def eval_iter(triple: tuple[int, int, np.ndarray]) -> tuple[int, int, int, int, int]:
+    """
+    Expects: (player index, seed, weights)
+    Returns: (player index, seed, score, duration, frames skipped by cycle
+    detection).  Kept small since these travel back over pipes and sockets.
+    """
+    i, seed, weights = triple
+    print(f"Evaluating player {i} on game {seed}.")
+
+    G = make_game_state(seed)
+    P = Player()
+    P.model.set_weights(weights)
+    P.play_game(G)
+
+    return i, seed, G.score, G.duration, G.frames_skipped
+
+
+def timed_eval_iter(triple: tuple[int, int, np.ndarray]) -> tuple[tuple, float]:
+    """Returns: result of eval_iter and seconds the worker spent on it."""
+    start = perf_counter()
+    result = eval_iter(triple)
+    return result, perf_counter() - start
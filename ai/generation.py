@@ -1,27 +1,22 @@
 from __future__ import annotations
-import multiprocessing as mp
 import os
+from time import perf_counter
 from typing import Optional
 
 import numpy as np
-from numpy.random import choice, randint
+from numpy.random import randint
 import pandas as pd
 
+from ai.checkpoint import CheckpointWriter, GenerationSnapshot, write_generation
+from ai.cluster import Coordinator
+from ai.evaluation import timed_eval_iter
+from ai.network import flatten_weights, unflatten_weights
+from ai.optimizers import Optimizer, make_optimizer
+from ai.param_store import ParamStore, read_manifest
 from ai.player import Player
+from ai.results_store import ResultsStore
+from ai.threads import make_pool, num_eval_processes
 from config.init_config import InitConfig
-from game.game_state import GameState
-
-
-def _eval_iter(triple: tuple[int, int, np.ndarray]) -> tuple[int, int, GameState]:
-    i, seed, weights = triple
-    print(f"Evaluating player {i} on game {seed}.")
-
-    G = GameState(seed=seed)
-    P = Player()
-    P.model.set_weights(weights)
-    P.play_game(G)
-
-    return i, seed, G
 
 
 class Generation(InitConfig):
@@ -41,45 +36,38 @@ class Generation(InitConfig):
 
         # Either breed previous gen or start fresh
         self.players = None
+        # (parent1, parent2) of each player, numbered in the previous gen.
+        self.parents = None
 
         # Metadata
         self.gen_number = gen_number
-        # Seeds for random number generation.  Helps recreate games
-        if generation_size is not None:
-            self.generation_size = generation_size
 
-    def breed(self, breeders: Optional[list[Player]] = None) -> list[Player]:
-        """
-        Either breed generation from list of breeders or start fresh
-        Returns: array of Player instances bred from breeders
-        """
-        new_gen = []
-        for i in range(self.generation_size):
-
-            if breeders is not None:
-                # The breeders survive.
-                if i < self.number_to_breed:
-                    self._print("Persisting breeder %d." % i)
-                    new_gen.append(breeders[i])
-                else:
-                    self._print("Breeding player %d." % i)
-                    P1, P2 = choice(breeders, 2, replace=False)
-                    new_gen.append(P1.breed(P2))
+        # Throughput of the last call to eval_players.
+        self.eval_stats = None
 
-            else:
-                self._print("Creating player %d from scratch." % i)
-                new_gen.append(Player())
+        # Only listens for remote workers once we actually need them.
+        self._coordinator = None
+        self._results_store = None
+        self._param_store = None
+        self._checkpoint_writer = None
+        # Made on first use, then kept so its state carries across gens.
+        self._optimizer = None
 
-        return new_gen
+        # Seeds for random number generation.  Helps recreate games
+        if generation_size is not None:
+            self.generation_size = generation_size
 
     def _print(self, msg: str) -> None:
+        if not self.verbose:
+            return
         os.system("clear")
         print(msg)
 
     def spawn_random(self) -> None:
         """Cold start: Spawn the first generation of players."""
-        players = self.breed()
-        self.players = players
+        self._print("Creating %d players from scratch." % self.generation_size)
+        self.players = [Player() for _ in range(self.generation_size)]
+        self.parents = [(-1, -1)] * self.generation_size
 
     def get_leader_board(self) -> pd.DataFrame:
         """Returns: DataFrame of key metrics for top performers (breeders) only"""
@@ -105,37 +93,138 @@ class Generation(InitConfig):
             columns=["model", "seed", "score", "duration", "fitness"]
         )
 
+        tasks = [
+            (i, seed, P.model.get_weights())
+            for (i, P) in enumerate(self.players)
+            for seed in randint(1000, 9999, size=self.num_games_to_play)
+        ]
+
         self._print("Evaluating players.")
-        with mp.get_context("spawn").Pool(mp.cpu_count()) as pool:
-            results = pool.map(
-                _eval_iter,
-                [
-                    (i, seed, P.model.get_weights())
-                    for (i, P) in enumerate(self.players)
-                    for seed in randint(1000, 9999, size=self.num_games_to_play)
-                ],
-            )
+        start = perf_counter()
+        if self.coordinator_address is not None:
+            num_workers = self.get_coordinator().num_workers
+            results = self.get_coordinator().evaluate(tasks)
+            busy_times = None
+        else:
+            num_workers = num_eval_processes(self.eval_processes, self.eval_threads)
+            if num_workers == 1:
+                timed_results = [timed_eval_iter(task) for task in tasks]
+            else:
+                with make_pool(
+                    num_workers, self.eval_threads, self.pin_eval_processes
+                ) as pool:
+                    timed_results = pool.map(timed_eval_iter, tasks)
+            results = [result for result, _ in timed_results]
+            busy_times = [busy for _, busy in timed_results]
+        self.eval_stats = self._get_eval_stats(
+            len(tasks), perf_counter() - start, num_workers, busy_times
+        )
 
-        for j, (i, seed, G) in enumerate(results):
+        self.eval_stats["frames_skipped"] = sum(r[4] for r in results)
+        for j, (i, seed, score, duration, _) in enumerate(results):
             new_summary.loc[j] = (
                 i,
                 seed,
-                G.score,
-                G.duration,
-                self.fitness_function(G.score, G.duration),
+                score,
+                duration,
+                self.fitness_function(score, duration),
             )
 
         self.summary = new_summary
 
-    def advance_next_gen(self) -> None:
+    def _get_eval_stats(
+        self,
+        num_evals: int,
+        seconds: float,
+        num_workers: int,
+        busy_times: Optional[list[float]],
+    ) -> dict:
+        """
+        Returns: games evaluated per second and the fraction of worker time
+        spent playing games (None if we can't see worker time).
         """
-        Updates self in place to form new generation.
+        utilization = None
+        if busy_times is not None and seconds > 0:
+            utilization = sum(busy_times) / (seconds * num_workers)
+
+        return {
+            "evals": num_evals,
+            "seconds": seconds,
+            "evals_per_sec": num_evals / seconds if seconds > 0 else np.nan,
+            "utilization": utilization,
+        }
+
+    def get_results_store(self) -> ResultsStore:
+        """Store of every game so far, under data_dir/results."""
+        if self._results_store is None:
+            self._results_store = ResultsStore(os.path.join(self.data_dir, "results"))
+        return self._results_store
+
+    def get_param_store(self) -> ParamStore:
+        """Store of every distinct player's weights, under data_dir/params."""
+        if self._param_store is None:
+            self._param_store = ParamStore(os.path.join(self.data_dir, "params"))
+        return self._param_store
+
+    def get_coordinator(self) -> Coordinator:
+        """Start listening for remote workers (first call only)."""
+        if self._coordinator is None:
+            host, port = self.coordinator_address
+            self._coordinator = Coordinator(host, port)
+            print("Listening for workers on %s:%d." % self._coordinator.address)
+        return self._coordinator
+
+    def close_coordinator(self) -> None:
+        """Tell any remote workers to shut down."""
+        if self._coordinator is not None:
+            self._coordinator.close()
+            self._coordinator = None
+
+    def get_optimizer(self) -> Optimizer:
+        """The optimizer named by self.optimizer (made on first call)."""
+        if self._optimizer is None:
+            shapes = self.players[0].model.weight_shapes
+            self._optimizer = make_optimizer(
+                self.optimizer, shapes, self.generation_size, self.get_config()
+            )
+        return self._optimizer
+
+    def advance_next_gen(self, immigrants: Optional[list[Player]] = None) -> None:
+        """
+        Updates self in place to form new generation, by telling the
+        optimizer how this one did and asking it for the next.
+        Immigrants (e.g. from another island) are offered to the optimizer:
+        "ga" has them take the places of the weakest breeders, and the
+        evolution strategies evaluate them next (see EvolutionStrategy).
         Returns: self
         """
-        leader_board = self.get_leader_board()
-        breeders = [self.players[int(i)] for i in leader_board["model"]]
-        players = self.breed(breeders)
-        self.players = players
+        if self.summary is None:
+            raise RuntimeError("Current gen has not been evaluated.")
+
+        fitness = (
+            self.summary.groupby("model")["fitness"]
+            .mean()
+            .reindex(range(len(self.players)), fill_value=-np.inf)
+            .values.astype(float)
+        )
+        population = np.stack(
+            [flatten_weights(P.model.get_weights()) for P in self.players]
+        )
+        immigrant_vectors = None
+        if immigrants:
+            immigrant_vectors = np.stack(
+                [flatten_weights(P.model.get_weights()) for P in immigrants]
+            )
+
+        self._print("Asking %s for the next generation." % self.optimizer)
+        optimizer = self.get_optimizer()
+        optimizer.tell(population, fitness, immigrant_vectors)
+        shapes = self.players[0].model.weight_shapes
+        self.players = [
+            Player(weights=unflatten_weights(vector, shapes))
+            for vector in optimizer.ask()
+        ]
+        self.parents = list(optimizer.parents)
 
         # Metadata
         self.gen_number += 1
@@ -155,53 +244,105 @@ class Generation(InitConfig):
 
             self._print("Evaluating players...")
             self.eval_players()
+            if self.detect_cycles:
+                self._print(
+                    "Cycle detection skipped %d frames."
+                    % self.eval_stats["frames_skipped"]
+                )
 
             self._print("Saving generation.")
             self.save_latest_gen()
 
     def save_latest_gen(self) -> None:
+        """
+        Save players and summary to data_dir/genNNNN.  With async_checkpoint
+        this only takes a snapshot, and a background thread writes it.
+        """
         if self.players is None or self.summary is None:
             raise RuntimeError(
                 "Need to breed or spawn players and evaluate" "before saving."
             )
 
-        save_dir = "gen%04d" % self.gen_number
-        for i, P in enumerate(self.players):
-            self._print("Saving player %d..." % i)
-
-            if not os.path.exists("data/" + save_dir):
-                os.mkdir("data/" + save_dir)
-
-            P.save_weights("data/%s/player%04d.h5" % (save_dir, i))
+        snapshot = GenerationSnapshot(
+            gen_number=self.gen_number,
+            weights=tuple(P.model.get_weights() for P in self.players),
+            summary=self.summary.copy(),
+            parents=None if self.parents is None else tuple(self.parents),
+            optimizer=self.optimizer,
+            optimizer_state=(
+                None if self._optimizer is None else self._optimizer.get_state()
+            ),
+        )
 
-        self._print("Saving summary.")
-        self.summary.to_csv("data/" + save_dir + "/summary.csv", index=False)
+        if self.async_checkpoint:
+            self._print("Queueing generation to be saved.")
+            self.get_checkpoint_writer().submit(snapshot)
+        else:
+            self._print("Saving generation %d." % self.gen_number)
+            write_generation(
+                self.data_dir,
+                snapshot,
+                self.get_results_store(),
+                self.get_param_store(),
+            )
+            self._print("Done.")
+
+    def get_checkpoint_writer(self) -> CheckpointWriter:
+        if self._checkpoint_writer is None:
+            self._checkpoint_writer = CheckpointWriter(
+                self.data_dir,
+                self.get_results_store(),
+                self.get_param_store(),
+                self.max_pending_checkpoints,
+            )
+        return self._checkpoint_writer
 
-        self._print("Done.")
+    def flush_checkpoints(self) -> None:
+        """Wait for any generations still being saved in the background."""
+        if self._checkpoint_writer is not None:
+            self._checkpoint_writer.close()
+            self._checkpoint_writer = None
 
     def load_gen(self, gen_number: int) -> None:
+        self.flush_checkpoints()
         self._print(f"Loading generation {gen_number}.")
         self.gen_number = gen_number
+        self.parents = None
+        self._optimizer = None
+        load_dir = os.path.join(self.data_dir, f"gen{gen_number:04.0f}")
         self.summary = pd.read_csv(
-            f"data/gen{gen_number:04.0f}/summary.csv", dtype={"seed": int}
+            os.path.join(load_dir, "summary.csv"), dtype={"seed": int}
         )
 
-        players = []
-        files = [
-            f
-            for f in os.listdir(f"./data/gen{gen_number:04.0f}")
-            if f.startswith("player")
-        ]
-        for fname in sorted(files):
-            self._print(f"Loading model {fname[6:-3]}.")
-            P = Player()
-            P.load_weights(f"data/gen{gen_number:04.0f}/{fname}")
-            players.append(P)
-
-        self.players = players
+        if os.path.exists(os.path.join(load_dir, "manifest.csv")):
+            weights = self.get_param_store().get_generation(read_manifest(load_dir))
+            self.players = [Player(weights=w) for w in weights]
+        else:
+            # Generations saved before the param store: one file per player.
+            players = []
+            files = [f for f in os.listdir(load_dir) if f.startswith("player")]
+            for fname in sorted(files):
+                self._print(f"Loading model {fname[6:10]}.")
+                P = Player()
+                P.load_weights(os.path.join(load_dir, fname))
+                players.append(P)
+            self.players = players
+
+        # Pick up the optimizer where it left off, unless it's been changed.
+        state_file = os.path.join(load_dir, "optimizer.npz")
+        if os.path.exists(state_file):
+            with np.load(state_file) as state:
+                if str(state["optimizer"]) == self.optimizer:
+                    self.get_optimizer().set_state(
+                        {k: state[k] for k in state.files if k != "optimizer"}
+                    )
 
     def load_latest_gen(self) -> None:
-        gens = [int(s[3:]) for s in os.listdir("data") if s.startswith("gen")]
+        self.flush_checkpoints()
+        if not os.path.exists(self.data_dir):
+            os.makedirs(self.data_dir)
+
+        gens = [int(s[3:]) for s in os.listdir(self.data_dir) if s.startswith("gen")]
         if len(gens) == 0:
             self.spawn_random()
             self.eval_players()
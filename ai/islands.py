@@ -0,0 +1,233 @@
+from __future__ import annotations
+import multiprocessing as mp
+import os
+import queue
+import traceback
+
+import pandas as pd
+
+from ai.generation import Generation
+from ai.player import Player
+from ai.threads import num_eval_processes, thread_limits
+from config.init_config import InitConfig
+
+
+def _run_island(
+    island: int,
+    num_gens: int,
+    config: dict,
+    save: bool,
+    inbox: mp.Queue,
+    outbox: mp.Queue,
+    reports: mp.Queue,
+) -> None:
+    """
+    Process target for one island: run _evolve_island, and report any
+    exception to the parent instead of dying silently.
+    """
+    try:
+        _evolve_island(island, num_gens, config, save, inbox, outbox, reports)
+    except Exception:
+        reports.put(("error", island, traceback.format_exc()))
+
+
+def _evolve_island(
+    island: int,
+    num_gens: int,
+    config: dict,
+    save: bool,
+    inbox: mp.Queue,
+    outbox: mp.Queue,
+    reports: mp.Queue,
+) -> None:
+    """
+    Evolve one island for num_gens generations in this process.  Every
+    migration_interval generations, send our best players to the next island
+    and take in whoever has arrived from the previous one (without waiting).
+    """
+    gen = Generation()
+    gen.set_config(config)
+    gen.generation_size = config["generation_size"] // config["num_islands"]
+    gen.data_dir = os.path.join(config["data_dir"], "island%02d" % island)
+    gen.verbose = False
+
+    if save:
+        gen.load_latest_gen()
+    else:
+        gen.spawn_random()
+        gen.eval_players()
+
+    immigrants = None
+    for i in range(1, num_gens + 1):
+        gen.advance_next_gen(immigrants)
+        gen.eval_players()
+        if save:
+            gen.save_latest_gen()
+
+        leader_board = gen.get_leader_board()
+        reports.put(
+            (
+                "summary",
+                island,
+                {
+                    "generation": gen.gen_number,
+                    "best_fitness": leader_board["avg_fitness"].max(),
+                    "mean_fitness": gen.summary["fitness"].mean(),
+                    "max_score": gen.summary["score"].max(),
+                    "mean_duration": gen.summary["duration"].mean(),
+                },
+            )
+        )
+
+        immigrants = None
+        if i % gen.migration_interval == 0:
+            best = leader_board["model"].values[: gen.num_migrants]
+            outbox.put([gen.players[int(j)].model.get_weights() for j in best])
+
+            immigrants = []
+            while True:
+                try:
+                    immigrants += [Player(weights=w) for w in inbox.get_nowait()]
+                except queue.Empty:
+                    break
+
+    # Child processes skip atexit, so don't leave saves behind.
+    gen.flush_checkpoints()
+
+    leader_board = gen.get_leader_board()
+    leader_board["island"] = island
+    leader_board["gen_number"] = gen.gen_number
+    weights = [gen.players[int(j)].model.get_weights() for j in leader_board["model"]]
+    reports.put(("done", island, (leader_board, weights)))
+
+
+class IslandModel(InitConfig):
+    """
+    This class splits the population into num_islands sub-populations that
+    evolve independently, each in its own process, so no core waits on the
+    slowest game of some other island.  The best few players of each island
+    migrate to the next island (in a ring) every migration_interval
+    generations.
+    """
+
+    def __init__(self, num_islands: int = None) -> None:
+        super().__init__()
+
+        if num_islands is not None:
+            self.num_islands = num_islands
+
+        # island -> list of per-generation summary statistics
+        self.island_summaries = {}
+        # Merged leaderboard and the matching weights, once run has finished.
+        self.leader_board = None
+        self.best_weights = None
+
+    def run(self, num_gens: int, save: bool = True) -> None:
+        """
+        Train every island num_gens more generations.  If save, each island
+        resumes from and saves to its own directory under data_dir.
+        """
+        ctx = mp.get_context("spawn")
+        inboxes = [ctx.Queue() for _ in range(self.num_islands)]
+        reports = ctx.Queue()
+
+        # Share the evaluation processes out between the islands.
+        config = self.get_config()
+        config["eval_processes"] = max(
+            num_eval_processes(self.eval_processes, self.eval_threads)
+            // self.num_islands,
+            1,
+        )
+
+        processes = [
+            ctx.Process(
+                target=_run_island,
+                args=(
+                    k,
+                    num_gens,
+                    config,
+                    save,
+                    inboxes[k],
+                    inboxes[(k + 1) % self.num_islands],
+                    reports,
+                ),
+            )
+            for k in range(self.num_islands)
+        ]
+        # Each island evaluates in its own process, so cap its threads too.
+        with thread_limits(self.eval_threads):
+            for p in processes:
+                p.start()
+
+        self.island_summaries = {k: [] for k in range(self.num_islands)}
+        finished = {}
+        while len(finished) < self.num_islands:
+            try:
+                kind, island, payload = reports.get(timeout=1.0)
+            except queue.Empty:
+                # An island killed outright (e.g. out of memory) never
+                # reports, so check nobody has died on us.
+                for k, p in enumerate(processes):
+                    if k not in finished and p.exitcode not in (None, 0):
+                        self._stop(processes)
+                        raise RuntimeError(f"Island {k} exited with code {p.exitcode}.")
+                continue
+
+            if kind == "summary":
+                self.island_summaries[island].append(payload)
+                print(f"Island {island}: {payload}")
+            elif kind == "error":
+                self._stop(processes)
+                raise RuntimeError(f"Island {island} failed:\n{payload}")
+            else:
+                finished[island] = payload
+
+        # The last migrants are never picked up, and an island can't exit
+        # until they are out of its pipe, so empty the inboxes while waiting.
+        while any(p.is_alive() for p in processes):
+            for inbox in inboxes:
+                try:
+                    while True:
+                        inbox.get_nowait()
+                except queue.Empty:
+                    pass
+            for p in processes:
+                p.join(timeout=0.1)
+
+        self._merge(finished)
+
+    def _stop(self, processes: list[mp.Process]) -> None:
+        """Terminate every island still running, e.g. after one has failed."""
+        for p in processes:
+            if p.is_alive():
+                p.terminate()
+        for p in processes:
+            p.join()
+
+    def get_island_summary(self, island: int) -> pd.DataFrame:
+        """Returns: DataFrame with one row of statistics per generation."""
+        return pd.DataFrame(self.island_summaries[island])
+
+    def get_leader_board(self) -> pd.DataFrame:
+        """Returns: the best number_to_breed players across all islands."""
+        if self.leader_board is None:
+            raise RuntimeError("Islands have not been run.")
+
+        return self.leader_board.head(self.number_to_breed)
+
+    def get_best_player(self) -> Player:
+        return Player(weights=self.best_weights[0])
+
+    def _merge(self, finished: dict) -> None:
+        boards = []
+        weights = []
+        for island in sorted(finished):
+            leader_board, island_weights = finished[island]
+            boards.append(leader_board)
+            weights += island_weights
+
+        merged = pd.concat(boards, ignore_index=True)
+        order = merged["avg_fitness"].sort_values(ascending=False, kind="stable").index
+
+        self.leader_board = merged.loc[order].reset_index(drop=True)
+        self.best_weights = [weights[i] for i in order]
@@ -0,0 +1,114 @@
+from __future__ import annotations
+from typing import Optional
+
+import numpy as np
+
+
+def flatten_weights(weights: list[np.ndarray]) -> np.ndarray:
+    """Returns: all weights concatenated into one flat parameter vector."""
+    return np.concatenate([np.ravel(w) for w in weights])
+
+
+def unflatten_weights(vector: np.ndarray, shapes: list[tuple]) -> list[np.ndarray]:
+    """Inverse of flatten_weights, given the shape of each weight array."""
+    weights = []
+    start = 0
+    for shape in shapes:
+        size = int(np.prod(shape))
+        weights.append(vector[start : start + size].reshape(shape))
+        start += size
+    return weights
+
+
+class DenseNetwork:
+    """
+    A fully connected network with relu hidden layers and a softmax output,
+    evaluated with plain numpy.  It mimics the parts of the keras Sequential
+    API that Player uses (get_weights, set_weights, predict_on_batch) so that
+    playing games never needs tensorflow.  Weights are float32 and laid out
+    exactly as keras lays out Dense layers, [kernel, bias] per layer, so they
+    can be moved to and from a keras model with to_keras/from_keras.
+    """
+
+    def __init__(
+        self, layer_sizes: list[int], weights: Optional[list[np.ndarray]] = None
+    ) -> None:
+        self.layer_sizes = layer_sizes
+
+        # Bumped whenever the weights change, so callers can tell when
+        # anything they derived from the weights is stale.
+        self.version = 0
+
+        if weights is None:
+            weights = self._glorot_uniform()
+        self.set_weights(weights)
+
+    def _glorot_uniform(self) -> list[np.ndarray]:
+        """Same initialization as keras Dense: glorot uniform, zero bias."""
+        # Use our own generator so that creating a network doesn't move the
+        # global RNG the games are seeded with.
+        rng = np.random.default_rng()
+        weights = []
+        for fan_in, fan_out in zip(self.layer_sizes[:-1], self.layer_sizes[1:]):
+            limit = np.sqrt(6 / (fan_in + fan_out))
+            weights.append(rng.uniform(-limit, limit, size=(fan_in, fan_out)))
+            weights.append(np.zeros(fan_out))
+        return weights
+
+    @property
+    def weight_shapes(self) -> list[tuple]:
+        return [w.shape for w in self._weights]
+
+    def get_weights(self) -> list[np.ndarray]:
+        return [w.copy() for w in self._weights]
+
+    def set_weights(self, weights: list[np.ndarray]) -> None:
+        expected = []
+        for fan_in, fan_out in zip(self.layer_sizes[:-1], self.layer_sizes[1:]):
+            expected += [(fan_in, fan_out), (fan_out,)]
+        if [np.shape(w) for w in weights] != expected:
+            raise ValueError("Weights do not match the network architecture.")
+
+        self._weights = [np.asarray(w, dtype=np.float32).copy() for w in weights]
+        self.version += 1
+
+    def predict_on_batch(self, inputs: np.ndarray) -> np.ndarray:
+        """
+        Expects: array of shape (batch size, input size)
+        Returns: array of shape (batch size, output size) of probabilities
+        """
+        x = np.asarray(inputs, dtype=np.float32)
+        num_layers = len(self._weights) // 2
+        for k in range(num_layers):
+            x = x @ self._weights[2 * k] + self._weights[2 * k + 1]
+            if k < num_layers - 1:
+                np.maximum(x, 0, out=x)
+
+        x = np.exp(x - x.max(axis=1, keepdims=True))
+        return x / x.sum(axis=1, keepdims=True)
+
+    def to_keras(self):
+        """Returns: an equivalent keras Sequential model (imports tensorflow)."""
+        from tensorflow.keras import Sequential
+        from tensorflow.keras.layers import Dense
+
+        layers = [
+            Dense(
+                self.layer_sizes[1],
+                input_shape=(self.layer_sizes[0],),
+                activation="relu",
+            )
+        ]
+        for size in self.layer_sizes[2:-1]:
+            layers.append(Dense(size, activation="relu"))
+        layers.append(Dense(self.layer_sizes[-1], activation="softmax"))
+
+        model = Sequential(layers)
+        # I have to specify a loss in order to compile, even though I won't
+        # be performing any kind of gradient descent.
+        model.compile(loss="mse")
+        model.set_weights(self._weights)
+        return model
+
+    def from_keras(self, model) -> None:
+        self.set_weights(model.get_weights())
@@ -0,0 +1,330 @@
+from __future__ import annotations
+from typing import Optional
+
+import numpy as np
+from numpy.random import normal, randint
+
+from config.init_config import InitConfig
+
+
+def crossover(left: np.ndarray, right: np.ndarray, shapes: list[tuple]) -> np.ndarray:
+    """
+    Expects: two arrays of shape (number of children, num_params), one row
+    per pair of parents, and the shape of each weight array in a row.
+    Returns: children of shape (number of children, num_params).  In each
+    weight array, a random split point is selected, and everything before it
+    in lexicographic order comes from left, everything after from right.
+    """
+    children = np.empty(np.shape(left))
+    start = 0
+    for shape in shapes:
+        size = int(np.prod(shape))
+        layer = slice(start, start + size)
+        split_points = randint(size, size=len(children))
+        from_left = np.arange(size) < split_points[:, None]
+        children[:, layer] = np.where(from_left, left[:, layer], right[:, layer])
+        start += size
+    return children
+
+
+class Optimizer(InitConfig):
+    """
+    Base class for the ways Generation can make its next population.  An
+    optimizer works on flat parameter vectors (see ai.network.flatten_weights)
+    with an ask/tell interface: tell it the population just evaluated and the
+    average fitness of each member, then ask it for the next population.
+    """
+
+    # Attributes that carry over from one generation to the next, which
+    # Generation saves alongside each generation (see get_state).
+    state_keys = ()
+
+    def __init__(
+        self,
+        shapes: list[tuple],
+        population_size: int,
+        config: Optional[dict] = None,
+    ) -> None:
+        super().__init__()
+        if config is not None:
+            self.set_config(config)
+
+        self.shapes = shapes
+        self.num_params = int(sum(np.prod(shape) for shape in shapes))
+        self.population_size = population_size
+
+        # (parent1, parent2) of each member of the last population asked for,
+        # numbered in the population told before it.  -1 = none.
+        self.parents = [(-1, -1)] * population_size
+
+    def tell(
+        self,
+        population: np.ndarray,
+        fitness: np.ndarray,
+        immigrants: Optional[np.ndarray] = None,
+    ) -> None:
+        """
+        Expects: array of shape (population size, num_params), fitness of
+        each row, and optionally parameter vectors from elsewhere (e.g.
+        another island) that the optimizer may use as it sees fit.
+        """
+        raise NotImplementedError
+
+    def ask(self) -> np.ndarray:
+        """Returns: next population, of shape (population_size, num_params)."""
+        raise NotImplementedError
+
+    def get_state(self) -> dict:
+        """
+        Returns: name -> array of everything needed to carry on from the last
+        population asked for, e.g. in a new process after loading it.
+        """
+        return {
+            k: np.copy(getattr(self, k))
+            for k in self.state_keys
+            if getattr(self, k) is not None
+        }
+
+    def set_state(self, state: dict) -> None:
+        for k, v in state.items():
+            setattr(self, k, v[()] if np.ndim(v) == 0 else np.array(v))
+
+
+class GeneticOptimizer(Optimizer):
+    """
+    The original breeding algorithm.  The top number_to_breed players (the
+    breeders) survive unchanged, and everyone else is a child of two distinct
+    random breeders: crossed over at a random split point in each layer, plus
+    Gaussian noise with standard deviation mutation_rate.  Immigrants replace
+    the weakest breeders.
+    """
+
+    def tell(
+        self,
+        population: np.ndarray,
+        fitness: np.ndarray,
+        immigrants: Optional[np.ndarray] = None,
+    ) -> None:
+        ranked = np.argsort(-fitness, kind="stable")[: self.number_to_breed]
+        breeders = population[ranked]
+        breeder_ids = list(ranked)
+
+        if immigrants is not None and len(immigrants) > 0:
+            immigrants = immigrants[: self.number_to_breed]
+            keep = max(len(breeders) - len(immigrants), 0)
+            breeders = np.concatenate([breeders[:keep], immigrants])
+            breeder_ids = breeder_ids[:keep] + [-1] * len(immigrants)
+
+        self._breeders = breeders
+        self._breeder_ids = breeder_ids
+
+    def ask(self) -> np.ndarray:
+        breeders = self._breeders
+        num_breeders = len(breeders)
+        num_children = self.population_size - num_breeders
+
+        # Two distinct breeders per child, uniformly.
+        left = randint(num_breeders, size=num_children)
+        right = (left + randint(1, num_breeders, size=num_children)) % num_breeders
+
+        children = crossover(breeders[left], breeders[right], self.shapes)
+        children += normal(scale=self.mutation_rate, size=children.shape)
+
+        ids = self._breeder_ids
+        self.parents = [(i, -1) for i in ids] + [
+            (ids[j], ids[k]) for j, k in zip(left, right)
+        ]
+        return np.concatenate([breeders, children])
+
+
+class EvolutionStrategy(Optimizer):
+    """
+    Base class for the optimizers that sample the population around a mean.
+    The first population told (e.g. random players) only picks the starting
+    mean: its best member.  Immigrants take the places of the last samples of
+    the next population, and if one of them beats every sample, the mean
+    moves to it.  They never count towards the update itself.
+    """
+
+    state_keys = ("mean", "num_immigrants")
+
+    def __init__(
+        self,
+        shapes: list[tuple],
+        population_size: int,
+        config: Optional[dict] = None,
+    ) -> None:
+        super().__init__(shapes, population_size, config)
+        self.mean = None
+        # Immigrants at the end of the last population asked for.
+        self.num_immigrants = 0
+        self._immigrants = None
+
+    def tell(
+        self,
+        population: np.ndarray,
+        fitness: np.ndarray,
+        immigrants: Optional[np.ndarray] = None,
+    ) -> None:
+        num_samples = len(population) - self.num_immigrants
+        samples, sample_fitness = population[:num_samples], fitness[:num_samples]
+
+        if self.mean is None:
+            self.mean = population[np.argmax(fitness)].astype(float)
+        else:
+            self._update(samples, sample_fitness)
+            if num_samples < len(population):
+                best = num_samples + np.argmax(fitness[num_samples:])
+                if fitness[best] > sample_fitness.max():
+                    self.mean = population[best].astype(float)
+
+        self._immigrants = None
+        if immigrants is not None and len(immigrants) > 0:
+            self._immigrants = immigrants[: self.population_size // 2]
+
+    def ask(self) -> np.ndarray:
+        population = self._sample()
+        self.num_immigrants = 0
+        if self._immigrants is not None:
+            self.num_immigrants = len(self._immigrants)
+            population[-self.num_immigrants :] = self._immigrants
+        return population
+
+    def _update(self, samples: np.ndarray, fitness: np.ndarray) -> None:
+        """Move the mean (and whatever else) given how the samples did."""
+        raise NotImplementedError
+
+    def _sample(self) -> np.ndarray:
+        """Returns: population_size samples around the mean."""
+        raise NotImplementedError
+
+
+class OpenAIES(EvolutionStrategy):
+    """
+    OpenAI-ES (Salimans et al., 2017).  The population is a cloud of
+    antithetic pairs mean +/- es_sigma * noise, and the mean takes a step of
+    es_learning_rate along the noise weighted by centred fitness ranks.
+    """
+
+    def _update(self, population: np.ndarray, fitness: np.ndarray) -> None:
+        # The noise each member was sampled with (recomputed rather than
+        # kept, so a population loaded from disk can be told too).
+        noise = (population - self.mean) / self.es_sigma
+
+        # Ranks scaled to [-0.5, 0.5] so outliers don't dominate the step.
+        shaped = np.empty(len(fitness))
+        shaped[np.argsort(fitness, kind="stable")] = np.arange(len(fitness))
+        shaped = shaped / max(len(fitness) - 1, 1) - 0.5
+
+        gradient = shaped @ noise / (len(fitness) * self.es_sigma)
+        self.mean = self.mean + self.es_learning_rate * gradient
+
+    def _sample(self) -> np.ndarray:
+        half = normal(size=(self.population_size // 2, self.num_params))
+        noise = np.concatenate([half, -half])
+        if self.population_size % 2 == 1:
+            # Odd sizes also evaluate the mean itself.
+            noise = np.concatenate([noise, np.zeros((1, self.num_params))])
+
+        return self.mean + self.es_sigma * noise
+
+
+class SeparableCMAES(EvolutionStrategy):
+    """
+    Separable CMA-ES (Ros & Hansen, 2008): CMA-ES with a diagonal covariance,
+    so each generation costs O(population_size * num_params).
+    """
+
+    state_keys = EvolutionStrategy.state_keys + (
+        "sigma",
+        "variances",
+        "p_sigma",
+        "p_c",
+        "num_updates",
+    )
+
+    def __init__(
+        self,
+        shapes: list[tuple],
+        population_size: int,
+        config: Optional[dict] = None,
+    ) -> None:
+        super().__init__(shapes, population_size, config)
+
+        n = self.num_params
+        mu = population_size // 2
+        weights = np.log(mu + 0.5) - np.log(np.arange(1, mu + 1))
+        self.weights = weights / weights.sum()
+        self.mu_eff = 1 / np.sum(self.weights**2)
+
+        self.c_sigma = (self.mu_eff + 2) / (n + self.mu_eff + 5)
+        self.d_sigma = (
+            1 + 2 * max(0, np.sqrt((self.mu_eff - 1) / (n + 1)) - 1) + self.c_sigma
+        )
+        self.c_c = 4 / (n + 4)
+        # Diagonal-only learning rates can be (n + 2) / 3 times faster.
+        c_1 = 2 / ((n + 1.3) ** 2 + self.mu_eff)
+        c_mu = 2 * (self.mu_eff - 2 + 1 / self.mu_eff) / ((n + 2) ** 2 + self.mu_eff)
+        self.c_1 = min(1, c_1 * (n + 2) / 3)
+        self.c_mu = min(1 - self.c_1, c_mu * (n + 2) / 3)
+        self.expected_norm = np.sqrt(n) * (1 - 1 / (4 * n) + 1 / (21 * n**2))
+
+        self.sigma = self.es_sigma
+        self.variances = np.ones(n)
+        self.p_sigma = np.zeros(n)
+        self.p_c = np.zeros(n)
+        self.num_updates = 0
+
+    def _update(self, population: np.ndarray, fitness: np.ndarray) -> None:
+        steps = (population - self.mean) / self.sigma
+        best = np.argsort(-fitness, kind="stable")[: len(self.weights)]
+        step = self.weights @ steps[best]
+        self.mean = self.mean + self.sigma * step
+        self.num_updates += 1
+
+        self.p_sigma = (1 - self.c_sigma) * self.p_sigma + np.sqrt(
+            self.c_sigma * (2 - self.c_sigma) * self.mu_eff
+        ) * step / np.sqrt(self.variances)
+        norm = np.linalg.norm(self.p_sigma)
+        self.sigma *= np.exp(
+            (self.c_sigma / self.d_sigma) * (norm / self.expected_norm - 1)
+        )
+
+        # Stall the covariance path while p_sigma is unusually long.
+        h_sigma = (
+            norm / np.sqrt(1 - (1 - self.c_sigma) ** (2 * self.num_updates))
+            < (1.4 + 2 / (self.num_params + 1)) * self.expected_norm
+        )
+        self.p_c = (1 - self.c_c) * self.p_c + h_sigma * np.sqrt(
+            self.c_c * (2 - self.c_c) * self.mu_eff
+        ) * step
+
+        self.variances = (
+            (1 - self.c_1 - self.c_mu) * self.variances
+            + self.c_1
+            * (self.p_c**2 + (1 - h_sigma) * self.c_c * (2 - self.c_c) * self.variances)
+            + self.c_mu * self.weights @ steps[best] ** 2
+        )
+
+    def _sample(self) -> np.ndarray:
+        noise = normal(size=(self.population_size, self.num_params))
+        return self.mean + self.sigma * noise * np.sqrt(self.variances)
+
+
+OPTIMIZERS = {
+    "ga": GeneticOptimizer,
+    "openai-es": OpenAIES,
+    "sep-cma-es": SeparableCMAES,
+}
+
+
+def make_optimizer(
+    name: str,
+    shapes: list[tuple],
+    population_size: int,
+    config: Optional[dict] = None,
+) -> Optimizer:
+    """Returns: new optimizer of the type named in OPTIMIZERS, given config."""
+    if name not in OPTIMIZERS:
+        raise ValueError(f"Unknown optimizer {name!r}.")
+    return OPTIMIZERS[name](shapes, population_size, config)
@@ -0,0 +1,153 @@
+from __future__ import annotations
+import hashlib
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.init_config import InitConfig
+
+
+def weights_key(weights: list[np.ndarray]) -> str:
+    """Returns: hash of a player's weights (shapes and float32 values)."""
+    digest = hashlib.sha256()
+    for w in weights:
+        w = np.ascontiguousarray(w, dtype=np.float32)
+        digest.update(repr(w.shape).encode())
+        digest.update(w.tobytes())
+    return digest.hexdigest()
+
+
+def read_manifest(gen_dir: str) -> list[str]:
+    """Returns: the parameter key of each player saved in gen_dir."""
+    manifest = pd.read_csv(os.path.join(gen_dir, "manifest.csv"), dtype={"params": str})
+    return list(manifest.sort_values("player")["params"])
+
+
+def write_manifest(gen_dir: str, keys: list[str]) -> None:
+    pd.DataFrame({"player": range(len(keys)), "params": keys}).to_csv(
+        os.path.join(gen_dir, "manifest.csv"), index=False
+    )
+
+
+def collect_garbage(data_dir: str) -> dict[str, list[str]]:
+    """
+    Delete weights no saved generation refers to, from every param store
+    under data_dir (including the islands').  A key referred to anywhere
+    under data_dir is kept everywhere.
+    Returns: store root -> keys deleted
+    """
+    roots = []
+    referenced = set()
+    for parent, dirs, files in os.walk(data_dir):
+        if "params" in dirs:
+            roots.append(os.path.join(parent, "params"))
+        dirs[:] = [d for d in dirs if not d.startswith(".") and d != "params"]
+        if os.path.basename(parent).startswith("gen") and "manifest.csv" in files:
+            referenced.update(read_manifest(parent))
+
+    return {root: ParamStore(root).collect_garbage(referenced) for root in roots}
+
+
+class ParamStore(InitConfig):
+    """
+    This class stores each distinct set of player weights once, in a file
+    named by its hash, so a generation on disk is just a manifest of keys.
+    Breeders carried over unchanged cost nothing to save again.
+
+    The weights of the last generation put or got stay in memory, so loading
+    a generation right after saving one (or its successor, which shares the
+    breeders) only reads the players that changed.
+    """
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        super().__init__()
+
+        if root is None:
+            root = os.path.join(self.data_dir, "params")
+        self.root = root
+        if not os.path.exists(root):
+            os.makedirs(root)
+
+        # key -> weights of the last generation put or got.
+        self._resident = {}
+        # Files read from disk by get_generation, for the curious.
+        self.blobs_read = 0
+
+    def put_generation(self, weights: Iterable[list[np.ndarray]]) -> list[str]:
+        """
+        Write any weights not already stored.
+        Returns: the key of each player's weights.
+        """
+        resident = {}
+        keys = []
+        for w in weights:
+            key = weights_key(w)
+            if key not in resident and not os.path.exists(self._blob_path(key)):
+                self._write_blob(key, w)
+            resident[key] = w
+            keys.append(key)
+
+        self._resident = resident
+        return keys
+
+    def get_generation(self, keys: list[str]) -> list[list[np.ndarray]]:
+        """Returns: weights for each key, only reading those not in memory."""
+        resident = {}
+        for key in keys:
+            if key in resident:
+                continue
+            if key in self._resident:
+                resident[key] = self._resident[key]
+            else:
+                with np.load(self._blob_path(key)) as f:
+                    resident[key] = [f[f"arr_{i}"] for i in range(len(f.files))]
+                self.blobs_read += 1
+
+        self._resident = resident
+        return [resident[key] for key in keys]
+
+    def keys(self) -> set[str]:
+        """Returns: key of every set of weights on disk."""
+        keys = set()
+        for subdir in os.listdir(self.root):
+            for fname in os.listdir(os.path.join(self.root, subdir)):
+                if fname.endswith(".npz") and not fname.startswith("."):
+                    keys.add(fname[: -len(".npz")])
+        return keys
+
+    def collect_garbage(self, referenced: set[str]) -> list[str]:
+        """
+        Delete every blob not in referenced, plus leftovers of interrupted
+        writes.  Don't run this while something is saving to the store: a
+        blob can be written before the manifest that refers to it.
+        Returns: keys deleted
+        """
+        deleted = []
+        for subdir in os.listdir(self.root):
+            path = os.path.join(self.root, subdir)
+            for fname in os.listdir(path):
+                key = fname[: -len(".npz")]
+                if fname.startswith(".") or key not in referenced:
+                    os.remove(os.path.join(path, fname))
+                    if not fname.startswith("."):
+                        deleted.append(key)
+            if len(os.listdir(path)) == 0:
+                os.rmdir(path)
+
+        self._resident = {k: v for k, v in self._resident.items() if k in referenced}
+        return deleted
+
+    def _write_blob(self, key: str, weights: list[np.ndarray]) -> None:
+        path = self._blob_path(key)
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        # Rename into place, so a blob that exists is always complete.
+        tmp_path = os.path.join(os.path.dirname(path), "." + key + ".tmp.npz")
+        np.savez(tmp_path, *weights)
+        os.replace(tmp_path, path)
+
+    def _blob_path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + ".npz")
@@ -1,40 +1,38 @@
 from __future__ import annotations
+from collections import OrderedDict
 from time import sleep
 from typing import Optional
 
 import numpy as np
-from numpy.random import normal, randint
-from tensorflow.keras import Sequential
-from tensorflow.keras.layers import Dense
+from numpy.random import normal
 
+from ai.network import DenseNetwork, flatten_weights, unflatten_weights
+from ai.optimizers import crossover
 from config.init_config import InitConfig
 from game.game_state import GameState
 
 
 class Player(InitConfig):
     """
-    This class mainly holds a keras model with methods for reading a game
+    This class mainly holds a neural network with methods for reading a game
     state and deciding how to move, as well as methods for breeding with
-    another Player instance.
+    another Player instance.  The network runs in numpy; tensorflow is only
+    imported to read or write keras .h5 weight files.
     """
 
     def __init__(self, weights: Optional[list[np.ndarray]] = None) -> None:
         super().__init__()
 
         # Architecture parameters set in InitConfig
-        layers = [Dense(24, input_shape=(24,), activation="relu")]
-        for _ in range(self.num_hidden_layers):
-            layers.append(Dense(self.hidden_layer_size, activation="relu"))
-        layers.append(Dense(4, activation="softmax"))
+        layer_sizes = [24, 24] + [self.hidden_layer_size] * self.num_hidden_layers
+        self.model = DenseNetwork(layer_sizes + [4], weights)
 
-        self.model = Sequential(layers)
-
-        # I have to specify a loss in order to compile, even though I won't
-        # be performing any kind of gradient descent.
-        self.model.compile(loss="mse")
-
-        if weights is not None:
-            self.model.set_weights(weights)
+        # LRU cache of network outputs, keyed on the exact inputs.  Only used
+        # if policy_cache_size > 0, and emptied whenever the weights change.
+        self._policy_cache = OrderedDict()
+        self._policy_cache_version = self.model.version
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     ###########################################################################
     #           Methods for interacting with a GameState instance
@@ -61,18 +59,18 @@ class Player(InitConfig):
 
         for dy, dx in directions:
 
-            # Line of sight: an array of game booaord values starting from the
-            # head, and going in this direction all the way to the nearest wall.
-            LOS = game_state.get_line_of_sight(dy, dx)
+            # Look along the line of sight from the head, going in this
+            # direction all the way to the nearest wall.
+            LOS_length, prize_seen, body_seen = game_state.look(dy, dx)
 
             # Distance to wall represented by 1+len(LOS)
-            dist_to_wall = len(LOS) + 1
+            dist_to_wall = LOS_length + 1
             # Trying inverse distance now
             inputs.append(1.0 / dist_to_wall)
             # Distance to prize
-            inputs.append(self._one_hot_detect(LOS == -1))
+            inputs.append(int(prize_seen))
             # Distance to body
-            inputs.append(self._one_hot_detect(LOS > 0))
+            inputs.append(int(body_seen))
 
         return np.array(inputs).reshape(1, 24)
 
@@ -107,9 +105,11 @@ class Player(InitConfig):
         parse_game_state.
         Returns: 2D array representing dy, dx for input into GameState.update
         """
-        prediction = self.model.predict_on_batch(parsed_game_state)
-        out_arr = np.array(prediction).flatten()
-        direction = np.random.choice(range(len(out_arr)), p=out_arr)
+        out_arr = self._predict(parsed_game_state)
+        if self.greedy_policy:
+            direction = np.argmax(out_arr)
+        else:
+            direction = np.random.choice(range(len(out_arr)), p=out_arr)
 
         if direction == 0:
             # Return an ordered pair representing dy, dx in array ordering
@@ -127,6 +127,47 @@ class Player(InitConfig):
         else:
             raise RuntimeError("Some weird argmax.")
 
+    def choose_move(self, game_state: GameState) -> np.ndarray:
+        """
+        Returns: direction to move in (for GameState.update).  Subclasses
+        can override this to do more than read the network's output.
+        """
+        if not self.greedy_policy:
+            # Sampling draws from the global RNG; let GameState.restore undo it.
+            game_state.save_rng()
+        return self.decide_direction(self.parse_game_state(game_state))
+
+    def _predict(self, parsed_game_state: np.ndarray) -> np.ndarray:
+        """
+        Returns: flattened network output, from the cache if we have seen
+        exactly these inputs since the weights last changed.
+        """
+        if self.policy_cache_size <= 0:
+            return np.array(self.model.predict_on_batch(parsed_game_state)).flatten()
+
+        if self._policy_cache_version != self.model.version:
+            self.clear_policy_cache()
+
+        key = parsed_game_state.tobytes()
+        out_arr = self._policy_cache.get(key)
+        if out_arr is not None:
+            self._policy_cache.move_to_end(key)
+            self.cache_hits += 1
+            return out_arr
+
+        self.cache_misses += 1
+        prediction = self.model.predict_on_batch(parsed_game_state)
+        out_arr = np.array(prediction).flatten()
+        self._policy_cache[key] = out_arr
+        if len(self._policy_cache) > self.policy_cache_size:
+            self._policy_cache.popitem(last=False)
+
+        return out_arr
+
+    def clear_policy_cache(self) -> None:
+        self._policy_cache.clear()
+        self._policy_cache_version = self.model.version
+
     def play_game(
         self, game_state: GameState, draw_game: bool = False, limit_time: bool = True
     ) -> None:
@@ -134,13 +175,20 @@ class Player(InitConfig):
         Play game until dead
         Expects: GameState instance.
         Returns: GameState
+        If detect_cycles is set, the game also ends as soon as the snake
+        repeats a state since it last scored (see InitConfig), and the number
+        of frames that saved is left in game_state.frames_skipped.
         """
+        if self.detect_cycles and not self.greedy_policy:
+            raise ValueError("Cycle detection needs greedy_policy.")
+
         time_limit = self.max_time_no_score if limit_time else np.inf
         previous_score = 0
+        # Hashes of states seen since the last score.
+        seen_states = set()
 
         while (not game_state.dead) and (game_state.duration < time_limit):
-            model_input = self.parse_game_state(game_state)
-            new_direction = self.decide_direction(model_input)
+            new_direction = self.choose_move(game_state)
 
             game_state.update(new_direction)
 
@@ -153,9 +201,35 @@ class Player(InitConfig):
                     self.max_time_allowed, time_limit + self.extra_time_per_score
                 )
                 previous_score = game_state.score
+                seen_states.clear()
             elif game_state.score > previous_score:
                 # Don't update time limit in this case.
                 previous_score = game_state.score
+                seen_states.clear()
+
+            if self.detect_cycles and not game_state.dead:
+                state = game_state.state_key()
+                if state in seen_states:
+                    self._end_cycle(game_state, time_limit)
+                    break
+                seen_states.add(state)
+
+    def _end_cycle(self, game_state: GameState, time_limit: float) -> None:
+        """
+        The policy is deterministic and nothing can change until the next
+        score, so a repeated state means the snake loops until time_limit.
+        Skip to the end, crediting those frames or not per cycle_fitness.
+        Without a time limit it would loop forever, so the game just ends
+        there, as with "truncate".
+        """
+        if time_limit == np.inf:
+            return
+
+        game_state.frames_skipped = int(time_limit) - game_state.duration
+        if self.cycle_fitness == "full":
+            game_state.duration = int(time_limit)
+        elif self.cycle_fitness != "truncate":
+            raise ValueError(f"Unknown cycle_fitness {self.cycle_fitness!r}.")
 
     ###########################################################################
     #               Methods for making new Player instances
@@ -165,17 +239,35 @@ class Player(InitConfig):
         Combine with other and return new SnakeModel
         Weights come as a list of arrays, one for each layer
         """
-        these_weights = self.model.get_weights()
-        those_weights = other.model.get_weights()
-
-        new_weights = []
-        for left_array, right_array in zip(these_weights, those_weights):
-            child = self._cross_arrays(left_array, right_array)
-            child_mutated = self._mutate_array(child, mutation_rate)
-            new_weights.append(child_mutated)
+        new_weights = self.breed_weights(
+            self.model.get_weights(), other.model.get_weights(), mutation_rate
+        )
 
         return Player(weights=new_weights)
 
+    def breed_weights(
+        self,
+        these_weights: list[np.ndarray],
+        those_weights: list[np.ndarray],
+        mutation_rate: float = None,
+    ) -> list[np.ndarray]:
+        """
+        Same as breed, but on weights directly, so callers that only hold
+        weights don't need to build a model for each parent.  Crossover is
+        the same one the "ga" optimizer uses (ai.optimizers.crossover).
+        """
+        shapes = [np.shape(w) for w in these_weights]
+        child = crossover(
+            flatten_weights(these_weights)[None],
+            flatten_weights(those_weights)[None],
+            shapes,
+        )[0]
+
+        return [
+            self._mutate_array(w, mutation_rate)
+            for w in unflatten_weights(child, shapes)
+        ]
+
     def _cross_arrays(self, tensor1: np.ndarray, tensor2: np.ndarray) -> np.ndarray:
         """
         Expects: Two numpy arrays of same shape.
@@ -186,14 +278,10 @@ class Player(InitConfig):
         if tensor1.shape != tensor2.shape:
             raise RuntimeError("Incompatible matrix shapes for crossover.")
 
-        num_entries = len(tensor1.flatten())
-        split_point = randint(num_entries)
-
-        crossed_tensor = np.zeros(num_entries)
-        crossed_tensor[:split_point] = tensor1.flatten()[:split_point]
-        crossed_tensor[split_point:] = tensor2.flatten()[split_point:]
-
-        return crossed_tensor.reshape(tensor1.shape)
+        crossed = crossover(
+            tensor1.reshape(1, -1), tensor2.reshape(1, -1), [tensor1.shape]
+        )
+        return crossed.reshape(tensor1.shape)
 
     def _mutate_array(self, arr: np.ndarray, mutation_rate: float = None) -> np.ndarray:
         """Mutate weights by adding gaussian noise"""
@@ -203,7 +291,18 @@ class Player(InitConfig):
         return arr + normal(scale=mutation_rate, size=arr.shape)
 
     def save_weights(self, save_loc: str) -> None:
-        self.model.save_weights(save_loc)
+        """Saves to .npz with numpy, or anything else through keras."""
+        if save_loc.endswith(".npz"):
+            np.savez(save_loc, *self.model.get_weights())
+        else:
+            self.model.to_keras().save_weights(save_loc)
 
     def load_weights(self, load_loc: str) -> None:
-        self.model.load_weights(load_loc)
+        """Loads .npz with numpy, or anything else through keras."""
+        if load_loc.endswith(".npz"):
+            with np.load(load_loc) as f:
+                self.model.set_weights([f[f"arr_{i}"] for i in range(len(f.files))])
+        else:
+            keras_model = self.model.to_keras()
+            keras_model.load_weights(load_loc)
+            self.model.from_keras(keras_model)
@@ -0,0 +1,245 @@
+from __future__ import annotations
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from config.init_config import InitConfig
+
+# One file of raw values per column, appended to after every generation.
+GAME_COLUMNS = {
+    "generation": np.int32,
+    "player": np.int32,
+    "seed": np.int32,
+    "score": np.int32,
+    "duration": np.int32,
+    "fitness": np.float64,
+}
+PLAYER_COLUMNS = {
+    "generation": np.int32,
+    "player": np.int32,
+    "parent1": np.int32,
+    "parent2": np.int32,
+}
+# One row per generation: generation, then [start, end) rows of that
+# generation in the game columns and in the player columns.
+INDEX_COLUMNS = 5
+
+
+class ResultsStore(InitConfig):
+    """
+    This class keeps every game of every generation in one append-only
+    columnar store, along with the parents of every player.  Games are stored
+    sorted by (generation, player), and an index of where each generation
+    starts means a query only reads the rows it needs, instead of rereading
+    a summary.csv per generation.
+
+    Parents are player numbers in the previous generation.  A player carried
+    over unchanged has parent2 = -1, and -1 for both means it came from
+    nowhere we know of (spawned from scratch or migrated in).
+    """
+
+    def __init__(self, root: Optional[str] = None) -> None:
+        super().__init__()
+
+        if root is None:
+            root = os.path.join(self.data_dir, "results")
+        self.root = root
+
+        for table in ["games", "players"]:
+            if not os.path.exists(os.path.join(root, table)):
+                os.makedirs(os.path.join(root, table))
+
+    ###########################################################################
+    #                           Writing
+    ###########################################################################
+    def append_generation(
+        self,
+        gen_number: int,
+        summary: pd.DataFrame,
+        parents: Optional[list[tuple[int, int]]] = None,
+    ) -> None:
+        """
+        Expects: generation number, summary DataFrame as made by
+        Generation.eval_players, and optionally (parent1, parent2) per player.
+        Storing a generation again (e.g. after load_gen) replaces it, and
+        drops every generation stored after it, since those came from the
+        old version.
+        """
+        index = self._read_index()
+        (rows,) = np.where(index[:, 0] == gen_number)
+        if len(rows) > 0:
+            index = index[: rows[0]]
+            with open(self._index_path(), "ab") as f:
+                f.truncate(index.nbytes)
+
+        games = summary.sort_values(["model", "seed"], kind="stable")
+        num_players = int(games["model"].max()) + 1
+        if parents is None:
+            parents = [(-1, -1)] * num_players
+
+        game_start, player_start = (0, 0) if len(index) == 0 else index[-1, [2, 4]]
+        game_values = {
+            "generation": np.full(len(games), gen_number),
+            "player": games["model"].values,
+            "seed": games["seed"].values,
+            "score": games["score"].values,
+            "duration": games["duration"].values,
+            "fitness": games["fitness"].values,
+        }
+        player_values = {
+            "generation": np.full(num_players, gen_number),
+            "player": np.arange(num_players),
+            "parent1": [p for p, _ in parents],
+            "parent2": [p for _, p in parents],
+        }
+        self._append("games", GAME_COLUMNS, game_values, game_start)
+        self._append("players", PLAYER_COLUMNS, player_values, player_start)
+
+        # Index goes last, so a crash part way leaves the store as it was
+        # (less any generations being replaced).
+        row = [
+            gen_number,
+            game_start,
+            game_start + len(games),
+            player_start,
+            player_start + num_players,
+        ]
+        with open(self._index_path(), "ab") as f:
+            f.truncate(index.nbytes)
+            np.array(row, dtype=np.int64).tofile(f)
+
+    def _append(self, table: str, columns: dict, values: dict, start: int) -> None:
+        for name, dtype in columns.items():
+            path = self._column_path(table, name)
+            with open(path, "ab") as f:
+                # Drop anything written after the last indexed generation.
+                f.truncate(start * np.dtype(dtype).itemsize)
+                np.asarray(values[name], dtype=dtype).tofile(f)
+
+    ###########################################################################
+    #                           Reading
+    ###########################################################################
+    def generations(self) -> np.ndarray:
+        return self._read_index()[:, 0]
+
+    def get_games(self, gen_number: int) -> pd.DataFrame:
+        """Returns: every game played by the given generation."""
+        _, start, end, _, _ = self._index_row(gen_number)
+        return self._read_table("games", GAME_COLUMNS, start, end)
+
+    def get_players(self, gen_number: int) -> pd.DataFrame:
+        """Returns: parents of every player in the given generation."""
+        _, _, _, start, end = self._index_row(gen_number)
+        return self._read_table("players", PLAYER_COLUMNS, start, end)
+
+    def get_leader_board(self, gen_number: int) -> pd.DataFrame:
+        """Same as Generation.get_leader_board, for any stored generation."""
+        return (
+            self.get_games(gen_number)
+            .rename(columns={"player": "model"})
+            .groupby("model")
+            .agg(
+                avg_fitness=("fitness", "mean"),
+                avg_duration=("duration", "mean"),
+                max_score=("score", "max"),
+            )
+            .sort_values("avg_fitness", ascending=False)
+            .head(self.number_to_breed)
+            .reset_index()
+        )
+
+    def get_trend(self) -> pd.DataFrame:
+        """
+        Returns: one row per generation with the best player's average
+        fitness, the mean fitness over all games and the best score.
+        """
+        index = self._read_index()
+        if len(index) == 0:
+            return pd.DataFrame(
+                columns=["generation", "best_fitness", "mean_fitness", "max_score"]
+            )
+
+        games = self._read_table("games", GAME_COLUMNS, 0, index[-1, 2])
+        generation = games["generation"].values
+        player = games["player"].values
+        fitness = games["fitness"].values
+
+        # Rows are sorted by (generation, player), so each player's games
+        # and each generation's games are contiguous runs.
+        new_player = np.r_[
+            True, (generation[1:] != generation[:-1]) | (player[1:] != player[:-1])
+        ]
+        player_starts = np.flatnonzero(new_player)
+        player_fitness = np.add.reduceat(fitness, player_starts) / np.diff(
+            np.r_[player_starts, len(fitness)]
+        )
+        player_generation = generation[player_starts]
+        gen_starts = np.flatnonzero(
+            np.r_[True, player_generation[1:] != player_generation[:-1]]
+        )
+
+        game_starts = index[:, 1]
+        return pd.DataFrame(
+            {
+                "generation": index[:, 0],
+                "best_fitness": np.maximum.reduceat(player_fitness, gen_starts),
+                "mean_fitness": np.add.reduceat(fitness, game_starts)
+                / (index[:, 2] - index[:, 1]),
+                "max_score": np.maximum.reduceat(games["score"].values, game_starts),
+            }
+        )
+
+    def get_lineage(self, gen_number: int, player: int) -> pd.DataFrame:
+        """
+        Returns: the player's ancestry, one row per generation going back,
+        following parent1 (the surviving or first parent).
+        """
+        rows = []
+        while player >= 0 and gen_number in self.generations():
+            _, _, _, start, _ = self._index_row(gen_number)
+            row = self._read_table(
+                "players", PLAYER_COLUMNS, start + player, start + player + 1
+            )
+            rows.append(row)
+            gen_number, player = gen_number - 1, int(row["parent1"].values[0])
+
+        if len(rows) == 0:
+            return pd.DataFrame(columns=list(PLAYER_COLUMNS))
+        return pd.concat(rows, ignore_index=True)
+
+    def _read_table(
+        self, table: str, columns: dict, start: int, end: int
+    ) -> pd.DataFrame:
+        data = {}
+        for name, dtype in columns.items():
+            itemsize = np.dtype(dtype).itemsize
+            data[name] = np.fromfile(
+                self._column_path(table, name),
+                dtype=dtype,
+                count=int(end - start),
+                offset=int(start) * itemsize,
+            )
+        return pd.DataFrame(data)
+
+    def _index_row(self, gen_number: int) -> np.ndarray:
+        index = self._read_index()
+        (rows,) = np.where(index[:, 0] == gen_number)
+        if len(rows) == 0:
+            raise KeyError(f"Generation {gen_number} is not stored.")
+        return index[rows[0]]
+
+    def _read_index(self) -> np.ndarray:
+        if not os.path.exists(self._index_path()):
+            return np.zeros((0, INDEX_COLUMNS), dtype=np.int64)
+        index = np.fromfile(self._index_path(), dtype=np.int64)
+        return index[: len(index) // INDEX_COLUMNS * INDEX_COLUMNS].reshape(
+            -1, INDEX_COLUMNS
+        )
+
+    def _index_path(self) -> str:
+        return os.path.join(self.root, "index.bin")
+
+    def _column_path(self, table: str, name: str) -> str:
+        return os.path.join(self.root, table, name + ".bin")
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import numpy as np
+
+from ai.player import Player
+from game.game_state import GameSnapshot, GameState
+
+# Same order as the network's outputs (see Player.decide_direction).
+MOVES = [np.array([-1, 0]), np.array([1, 0]), np.array([0, -1]), np.array([0, 1])]
+
+
+class SearchPlayer(Player):
+    """
+    Player that looks ahead before each move.  It tries every move on the
+    real game, follows each with search_depth frames of the network's greedy
+    policy, scores the result with fitness_function (score gained, frames
+    survived), and then puts the game back with GameState.restore.  The best
+    move wins, with ties going to the move the network likes best.
+
+    Restoring also restores the RNG, so searching never changes where the
+    real game's prizes appear.
+    """
+
+    def __init__(self, weights: list[np.ndarray] = None) -> None:
+        super().__init__(weights)
+
+        # Reused for every move, so searching doesn't allocate snapshots.
+        self._root = None
+        # Frames played while searching, for benchmarks.
+        self.frames_searched = 0
+
+    def choose_move(self, game_state: GameState) -> np.ndarray:
+        root = self._get_root(game_state)
+        game_state.snapshot(root)
+
+        probabilities = self._predict(self.parse_game_state(game_state))
+        best_move, best_value = None, -np.inf
+        for k in np.argsort(-probabilities, kind="stable"):
+            if np.all(MOVES[k] == -game_state.direction):
+                # Reversing is ignored by update, so this is just going straight.
+                continue
+
+            value = self._rollout(game_state, MOVES[k])
+            game_state.restore(root)
+            if value > best_value:
+                best_move, best_value = MOVES[k], value
+
+        return best_move
+
+    def _rollout(self, game_state: GameState, move: np.ndarray) -> float:
+        """Play move and then the greedy policy.  Returns: fitness of that."""
+        start_score, start_duration = game_state.score, game_state.duration
+
+        game_state.update(move)
+        for _ in range(self.search_depth):
+            if game_state.dead:
+                break
+            probabilities = self._predict(self.parse_game_state(game_state))
+            game_state.update(MOVES[np.argmax(probabilities)])
+
+        self.frames_searched += game_state.duration - start_duration
+        return self.fitness_function(
+            game_state.score - start_score, game_state.duration - start_duration
+        )
+
+    def _get_root(self, game_state: GameState) -> GameSnapshot:
+        if (
+            type(self._root) is not game_state.snapshot_class
+            or self._root.board_size != game_state.board_size
+        ):
+            self._root = game_state.new_snapshot()
+        return self._root
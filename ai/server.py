@@ -0,0 +1,147 @@
+from __future__ import annotations
+import asyncio
+import json
+from collections import Counter, deque
+from time import perf_counter
+from typing import Optional
+
+import numpy as np
+
+from ai.player import Player
+from config.init_config import InitConfig
+
+
+class InferenceServer(InitConfig):
+    """
+    This class serves one or more Player models over TCP.  Clients send one
+    JSON object per line of the form {"model": name, "features": [24 floats]}
+    (i.e. the output of Player.parse_game_state) and get back one line
+    {"probs": [4 floats]}.  Requests for the same model that arrive within
+    max_batch_latency seconds of each other are answered by a single batched
+    forward pass.  Sending {"command": "stats"} returns latency and batch size
+    statistics instead.
+    """
+
+    def __init__(self, players: Optional[dict[str, Player]] = None) -> None:
+        super().__init__()
+
+        self.players = {}
+        self._queues = {}
+        self._batchers = []
+
+        # Seconds from a request arriving to its answer being sent.
+        self.latencies = deque(maxlen=100000)
+        # Number of forward passes made at each batch size.
+        self.batch_sizes = Counter()
+
+        for name, player in (players or {}).items():
+            self.add_player(name, player)
+
+    def add_player(self, name: str, player: Player) -> None:
+        self.players[name] = player
+
+    def load_player(self, name: str, load_loc: str) -> None:
+        player = Player()
+        player.load_weights(load_loc)
+        self.add_player(name, player)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> asyncio.Server:
+        """Start listening and one batching task per model."""
+        for name in self.players:
+            self._queues[name] = asyncio.Queue()
+            self._batchers.append(asyncio.create_task(self._batch_loop(name)))
+
+        server = await asyncio.start_server(self._handle_client, host, port)
+        self.address = server.sockets[0].getsockname()[:2]
+        return server
+
+    async def stop(self, server: asyncio.Server) -> None:
+        server.close()
+        await server.wait_closed()
+        for task in self._batchers:
+            task.cancel()
+        await asyncio.gather(*self._batchers, return_exceptions=True)
+        self._batchers = []
+
+    async def predict(self, name: str, features: np.ndarray) -> np.ndarray:
+        """
+        Expects: model name and a feature vector of length 24.
+        Returns: softmax output of length 4, once its batch has run.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queues[name].put((features, future))
+        return await future
+
+    def report(self) -> dict:
+        """Returns: p50/p99 latency in ms and histogram of batch sizes."""
+        if len(self.latencies) == 0:
+            p50, p99 = np.nan, np.nan
+        else:
+            p50, p99 = 1000 * np.percentile(self.latencies, [50, 99])
+
+        return {
+            "requests": len(self.latencies),
+            "p50_ms": float(p50),
+            "p99_ms": float(p99),
+            "batch_sizes": dict(sorted(self.batch_sizes.items())),
+        }
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write(await self._answer(line))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _answer(self, line: bytes) -> bytes:
+        start = perf_counter()
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise TypeError("Request must be a JSON object.")
+            if request.get("command") == "stats":
+                return (json.dumps(self.report()) + "\n").encode()
+
+            features = np.asarray(request["features"], dtype=float).reshape(24)
+            probs = await self.predict(request["model"], features)
+            response = {"probs": probs.tolist()}
+        except (ValueError, KeyError, TypeError) as e:
+            response = {"error": repr(e)}
+        else:
+            self.latencies.append(perf_counter() - start)
+
+        return (json.dumps(response) + "\n").encode()
+
+    async def _batch_loop(self, name: str) -> None:
+        loop = asyncio.get_running_loop()
+        queue = self._queues[name]
+        model = self.players[name].model
+
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_batch_latency
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            inputs = np.stack([features for features, _ in batch])
+            # Keep the event loop free for IO while the model runs.
+            outputs = await loop.run_in_executor(None, model.predict_on_batch, inputs)
+            self.batch_sizes[len(batch)] += 1
+
+            for (_, future), probs in zip(batch, np.asarray(outputs)):
+                if not future.done():
+                    future.set_result(probs)
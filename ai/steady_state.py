@@ -0,0 +1,166 @@
+from __future__ import annotations
+import bisect
+import queue
+from time import perf_counter
+
+import numpy as np
+from numpy.random import choice, randint
+import pandas as pd
+
+from ai.evaluation import timed_eval_iter
+from ai.generation import Generation
+from ai.player import Player
+from ai.threads import make_pool, num_eval_processes
+from config.init_config import InitConfig
+
+
+def _eval_individual(task: tuple[int, list[int], list[np.ndarray]]) -> tuple:
+    """
+    Expects: (individual id, seeds, weights)
+    Returns: (id, [(seed, score, duration) per game], seconds spent)
+    """
+    i, seeds, weights = task
+    games = []
+    busy = 0.0
+    for seed in seeds:
+        (_, _, score, duration, _), elapsed = timed_eval_iter((i, seed, weights))
+        games.append((seed, score, duration))
+        busy += elapsed
+
+    return i, games, busy
+
+
+class SteadyStateEvolution(InitConfig):
+    """
+    This class evolves players without generations.  Whenever a worker
+    finishes a player, the player is ranked against the rest of the population
+    (which keeps the best generation_size players seen) and a new child of the
+    current top number_to_breed is handed straight back to that worker.  A slow
+    game only ever holds up its own worker.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+
+        # Sorted best first, as (-fitness, id, weights, games).
+        self.population = []
+        self.num_evaluated = 0
+        self.stats = None
+
+        self._next_id = 0
+        # id -> weights of players out with the workers.
+        self._weights_in_flight = {}
+        # Only used for its breeding methods.
+        self._breeder = None
+
+    def run(self, num_evals: int) -> None:
+        """Evaluate num_evals more players, breeding as we go."""
+        num_workers = num_eval_processes(self.eval_processes, self.eval_threads)
+        done = queue.Queue()
+        busy = 0.0
+        in_flight = 0
+        dispatched = 0
+
+        start = perf_counter()
+        with make_pool(num_workers, self.eval_threads, self.pin_eval_processes) as pool:
+
+            def dispatch() -> None:
+                nonlocal in_flight, dispatched
+                pool.apply_async(
+                    _eval_individual,
+                    (self._next_task(),),
+                    callback=done.put,
+                    error_callback=done.put,
+                )
+                in_flight += 1
+                dispatched += 1
+
+            # Keep every worker busy with one queued task in reserve.
+            while dispatched < min(num_evals, 2 * num_workers):
+                dispatch()
+
+            while in_flight > 0:
+                result = done.get()
+                in_flight -= 1
+                if isinstance(result, BaseException):
+                    raise result
+
+                busy += self._insert(*result)
+                if dispatched < num_evals:
+                    dispatch()
+
+        seconds = perf_counter() - start
+        self.stats = {
+            "evals": num_evals,
+            "seconds": seconds,
+            "evals_per_sec": num_evals / seconds,
+            "utilization": busy / (seconds * num_workers),
+        }
+
+    def get_leader_board(self) -> pd.DataFrame:
+        """Returns: DataFrame of key metrics for the current top performers"""
+        rows = []
+        for neg_fitness, i, _, games in self.population[: self.number_to_breed]:
+            rows.append(
+                {
+                    "model": i,
+                    "avg_fitness": -neg_fitness,
+                    "avg_duration": np.mean([d for _, _, d in games]),
+                    "max_score": max(s for _, s, _ in games),
+                }
+            )
+
+        return pd.DataFrame(
+            rows, columns=["model", "avg_fitness", "avg_duration", "max_score"]
+        )
+
+    def to_generation(self, gen_number: int = 1) -> Generation:
+        """
+        Returns: Generation holding the current population, e.g. to save with
+        save_latest_gen or keep training generationally.
+        """
+        gen = Generation(gen_number)
+        gen.set_config(self.get_config())
+        gen.generation_size = len(self.population)
+        gen.players = [Player(weights=w) for _, _, w, _ in self.population]
+        gen.summary = pd.DataFrame(
+            [
+                (j, seed, score, duration, self.fitness_function(score, duration))
+                for j, (_, _, _, games) in enumerate(self.population)
+                for seed, score, duration in games
+            ],
+            columns=["model", "seed", "score", "duration", "fitness"],
+        )
+        return gen
+
+    def _next_task(self) -> tuple[int, list[int], list[np.ndarray]]:
+        """
+        Returns: a fresh random player until we have enough to breed from,
+        then children of two random players from the current elite.
+        """
+        if self._breeder is None:
+            self._breeder = Player()
+
+        if len(self.population) < self.number_to_breed:
+            weights = Player().model.get_weights()
+        else:
+            elite = self.population[: self.number_to_breed]
+            j, k = choice(len(elite), 2, replace=False)
+            weights = self._breeder.breed_weights(elite[j][2], elite[k][2])
+
+        i = self._next_id
+        self._next_id += 1
+        self._weights_in_flight[i] = weights
+        seeds = list(randint(1000, 9999, size=self.num_games_to_play))
+        return i, seeds, weights
+
+    def _insert(self, i: int, games: list[tuple], busy: float) -> float:
+        """Rank a finished player.  Returns: worker seconds it took."""
+        fitness = np.mean([self.fitness_function(s, d) for _, s, d in games])
+        weights = self._weights_in_flight.pop(i)
+
+        bisect.insort(self.population, (-fitness, i, weights, games))
+        del self.population[self.generation_size :]
+        self.num_evaluated += 1
+
+        return busy
@@ -0,0 +1,93 @@
+from __future__ import annotations
+import multiprocessing as mp
+import os
+import sys
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# Environment variables that size the thread pools of the BLAS behind numpy
+# and of tensorflow.  They are read when those libraries load, so they must
+# be set before a worker process starts.
+THREAD_ENV_VARS = [
+    "OMP_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "TF_NUM_INTRAOP_THREADS",
+    "TF_NUM_INTEROP_THREADS",
+]
+
+
+def available_cpus() -> list[int]:
+    """Returns: the CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(mp.cpu_count()))
+
+
+def num_eval_processes(eval_processes: Optional[int], eval_threads: int) -> int:
+    """Returns: eval_processes, or by default as many as fill every CPU."""
+    if eval_processes is not None:
+        return eval_processes
+    return max(len(available_cpus()) // eval_threads, 1)
+
+
+@contextmanager
+def thread_limits(num_threads: int) -> Iterator[None]:
+    """
+    Cap the BLAS and tensorflow thread pools of any process started inside
+    this block at num_threads each.  Without this, every worker sizes its
+    pools to the whole machine, and a pool of one worker per core runs
+    cores squared threads.
+    """
+    saved = {k: os.environ.get(k) for k in THREAD_ENV_VARS}
+    os.environ.update({k: str(num_threads) for k in THREAD_ENV_VARS})
+    try:
+        yield
+    finally:
+        for k, v in saved.items():
+            if v is None:
+                del os.environ[k]
+            else:
+                os.environ[k] = v
+
+
+def _init_worker(num_threads: int, pin: bool, counter) -> None:
+    """Pool initializer: apply the thread caps and optionally pin to CPUs."""
+    if "tensorflow" in sys.modules:
+        # Only if something imported it before we got here; otherwise the
+        # environment variables take care of it.
+        threading = sys.modules["tensorflow"].config.threading
+        threading.set_intra_op_parallelism_threads(num_threads)
+        threading.set_inter_op_parallelism_threads(num_threads)
+
+    if pin and hasattr(os, "sched_setaffinity"):
+        with counter.get_lock():
+            slot = counter.value
+            counter.value += 1
+
+        os.sched_setaffinity(0, worker_cpus(slot, num_threads, available_cpus()))
+
+
+def worker_cpus(slot: int, num_threads: int, cpus: list[int]) -> list[int]:
+    """
+    Returns: the num_threads CPUs worker number slot is pinned to, the next
+    block after the previous worker's, wrapping around the end of cpus.
+    """
+    start = slot * num_threads
+    return [cpus[(start + k) % len(cpus)] for k in range(num_threads)]
+
+
+def make_pool(processes: int, threads: int = 1, pin: bool = False) -> mp.pool.Pool:
+    """
+    Returns: a spawn Pool of processes workers, each limited to threads BLAS
+    and tensorflow threads, and pinned to its own CPUs if pin.
+    """
+    ctx = mp.get_context("spawn")
+    with thread_limits(threads):
+        return ctx.Pool(
+            processes,
+            initializer=_init_worker,
+            initargs=(threads, pin, ctx.Value("i", 0)),
+        )
@@ -0,0 +1,307 @@
+import argparse
+import copy
+import os
+import subprocess
+import sys
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+
+from ai.evaluation import timed_eval_iter
+from ai.generation import Generation
+from ai.optimizers import OPTIMIZERS
+from ai.player import Player
+from ai.search_player import SearchPlayer
+from ai.steady_state import SteadyStateEvolution
+from ai.threads import available_cpus, make_pool
+from game.backends import GAME_BACKENDS, make_game_state
+
+
+def compare_evolution(num_gens: int, generation_size: int, processes: int) -> None:
+    """
+    Evaluate the same number of players generationally and steady-state,
+    and compare throughput and how busy the workers were.
+    """
+    gen = Generation(generation_size=generation_size)
+    gen.eval_processes = processes
+    gen.number_to_breed = min(gen.number_to_breed, generation_size // 2)
+    gen.verbose = False
+
+    rows = []
+    gen.spawn_random()
+    for i in range(num_gens):
+        if i > 0:
+            gen.advance_next_gen()
+        gen.eval_players()
+        rows.append(gen.eval_stats)
+    generational = pd.DataFrame(rows)
+
+    steady = SteadyStateEvolution()
+    steady.set_config(gen.get_config())
+    steady.run(num_gens * generation_size)
+
+    print(
+        pd.DataFrame(
+            {
+                "generational": {
+                    "evals": generational["evals"].sum(),
+                    "seconds": generational["seconds"].sum(),
+                    "evals_per_sec": generational["evals"].sum()
+                    / generational["seconds"].sum(),
+                    "utilization": (
+                        generational["utilization"] * generational["seconds"]
+                    ).sum()
+                    / generational["seconds"].sum(),
+                },
+                "steady_state": steady.stats,
+            }
+        )
+    )
+
+
+def compare_optimizers(
+    names: list[str], num_gens: int, generation_size: int, processes: int
+) -> pd.DataFrame:
+    """
+    Train each optimizer from its own random start for num_gens generations.
+    Returns: DataFrame with, per optimizer and generation, the best player's
+    average fitness and the total frames simulated so far, which is what
+    training time is really spent on.
+    """
+    rows = []
+    for name in names:
+        gen = Generation(generation_size=generation_size)
+        gen.eval_processes = processes
+        gen.number_to_breed = min(gen.number_to_breed, generation_size // 2)
+        gen.verbose = False
+        gen.optimizer = name
+
+        frames = 0
+        gen.spawn_random()
+        for i in range(num_gens):
+            if i > 0:
+                gen.advance_next_gen()
+            gen.eval_players()
+
+            # Frames skipped by cycle detection were never simulated.
+            frames += int(gen.summary["duration"].sum())
+            if gen.cycle_fitness == "full":
+                frames -= gen.eval_stats["frames_skipped"]
+            rows.append(
+                {
+                    "optimizer": name,
+                    "generation": gen.gen_number,
+                    "frames": frames,
+                    "best_fitness": gen.get_leader_board()["avg_fitness"].max(),
+                    "mean_fitness": gen.summary["fitness"].mean(),
+                }
+            )
+
+    return pd.DataFrame(rows)
+
+
+def probe_threads(num_evals: int, pin: bool) -> pd.DataFrame:
+    """
+    Evaluate the same games with a range of processes x threads layouts
+    (every core busy, and half of them), and optionally pinned as well.
+    Returns: DataFrame of evaluations per second per layout, best first.
+    """
+    num_cpus = len(available_cpus())
+    layouts = set()
+    threads = 1
+    while threads <= num_cpus:
+        for processes in [num_cpus // threads, num_cpus // (2 * threads)]:
+            if processes > 0:
+                layouts.add((processes, threads))
+        threads *= 2
+
+    tasks = [(i, 1000 + i, Player().model.get_weights()) for i in range(num_evals)]
+    rows = []
+    for processes, threads in sorted(layouts):
+        for pinned in [False, True] if pin else [False]:
+            with make_pool(processes, threads, pinned) as pool:
+                # Warm up, so worker startup isn't counted.
+                pool.map(timed_eval_iter, tasks[:processes])
+                start = perf_counter()
+                pool.map(timed_eval_iter, tasks)
+                seconds = perf_counter() - start
+            rows.append(
+                {
+                    "processes": processes,
+                    "threads": threads,
+                    "pinned": pinned,
+                    "evals_per_sec": num_evals / seconds,
+                }
+            )
+
+    return (
+        pd.DataFrame(rows)
+        .sort_values("evals_per_sec", ascending=False)
+        .reset_index(drop=True)
+    )
+
+
+def snapshot_report(num_snapshots: int, num_games: int) -> pd.DataFrame:
+    """
+    For each game backend, time snapshot + restore round trips (and
+    copy.deepcopy, the old way to branch a game), and the frames per second a
+    SearchPlayer plays, counting the frames it searches.
+    Returns: DataFrame with one row per backend.
+    """
+    rows = []
+    for backend in GAME_BACKENDS:
+        G = make_game_state(1, backend)
+        for _ in range(5):
+            G.update(np.array([0, 1]))
+
+        buf = G.new_snapshot()
+        start = perf_counter()
+        for _ in range(num_snapshots):
+            G.snapshot(buf)
+            G.restore(buf)
+        snapshot_seconds = perf_counter() - start
+
+        start = perf_counter()
+        for _ in range(num_snapshots):
+            copy.deepcopy(G)
+            np.random.get_state()
+        deepcopy_seconds = perf_counter() - start
+
+        P = SearchPlayer()
+        P.greedy_policy = True
+        frames = 0
+        start = perf_counter()
+        for seed in range(num_games):
+            G = make_game_state(seed, backend)
+            P.play_game(G)
+            frames += G.duration
+        search_seconds = perf_counter() - start
+
+        rows.append(
+            {
+                "backend": backend,
+                "snapshots_per_sec": num_snapshots / snapshot_seconds,
+                "deepcopies_per_sec": num_snapshots / deepcopy_seconds,
+                "game_frames_per_sec": frames / search_seconds,
+                "search_frames_per_sec": P.frames_searched / search_seconds,
+            }
+        )
+
+    return pd.DataFrame(rows)
+
+
+def startup_report(modules: list[str]) -> pd.DataFrame:
+    """
+    Import each module in a fresh interpreter with -X importtime.
+    Returns: DataFrame with the time to import each module, whether that
+    pulled in tensorflow or pandas, and the slowest top level imports.
+    """
+    rows = []
+    for module in modules:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        )
+
+        # Lines look like "import time:  self | cumulative |   package", with
+        # the package indented two spaces per level of nesting, and children
+        # listed before the package that imported them.
+        seconds = 0.0
+        children, direct_imports = [], []
+        imported = set()
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            _, cumulative, package = line[len("import time:") :].split("|")
+            name = package.strip()
+            depth = (len(package) - len(package.lstrip()) - 1) // 2
+            imported.add(name)
+
+            if depth == 1:
+                children.append((name, int(cumulative) / 1e6))
+            elif depth == 0:
+                if name == module:
+                    seconds = int(cumulative) / 1e6
+                    direct_imports = children
+                children = []
+
+        slowest = sorted(direct_imports, key=lambda kv: -kv[1])[:3]
+        rows.append(
+            {
+                "entry_point": module + ".py",
+                "seconds": seconds,
+                "tensorflow": "tensorflow" in imported,
+                "pandas": "pandas" in imported,
+                "slowest": ", ".join(f"{k} {v:.2f}s" for k, v in slowest),
+                "error": (
+                    proc.stderr.strip().splitlines()[-1] if proc.returncode != 0 else ""
+                ),
+            }
+        )
+
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Performance reports.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    evolution = commands.add_parser(
+        "evolution", help="Generational vs steady-state evaluation throughput."
+    )
+    evolution.add_argument("--gens", type=int, default=3)
+    evolution.add_argument("--size", type=int, default=100)
+    evolution.add_argument("--processes", type=int, default=None)
+
+    optimizers = commands.add_parser(
+        "optimizers", help="Best fitness vs frames simulated for each optimizer."
+    )
+    optimizers.add_argument("names", nargs="*", default=sorted(OPTIMIZERS))
+    optimizers.add_argument("--gens", type=int, default=10)
+    optimizers.add_argument("--size", type=int, default=100)
+    optimizers.add_argument("--processes", type=int, default=None)
+
+    threads = commands.add_parser(
+        "threads", help="Find the best evaluation processes x threads layout."
+    )
+    threads.add_argument("--evals", type=int, default=200)
+    threads.add_argument("--pin", action="store_true", help="Also try pinning.")
+
+    snapshot = commands.add_parser(
+        "snapshot", help="GameState snapshot/restore and SearchPlayer speed."
+    )
+    snapshot.add_argument("--snapshots", type=int, default=10000)
+    snapshot.add_argument("--games", type=int, default=2)
+
+    startup = commands.add_parser(
+        "startup", help="Import time of each entry point (like -X importtime)."
+    )
+    startup.add_argument(
+        "modules",
+        nargs="*",
+        default=["train", "demo", "play_snake", "eval_worker", "serve"],
+    )
+
+    args = parser.parse_args()
+    if args.command == "evolution":
+        compare_evolution(args.gens, args.size, args.processes)
+    elif args.command == "optimizers":
+        report = compare_optimizers(args.names, args.gens, args.size, args.processes)
+        print(report.to_string(index=False))
+    elif args.command == "threads":
+        report = probe_threads(args.evals, args.pin)
+        print(report.to_string(index=False))
+        best = report.iloc[0]
+        print(
+            f"Best: eval_processes = {best['processes']}, "
+            f"eval_threads = {best['threads']}, "
+            f"pin_eval_processes = {best['pinned']}"
+        )
+    elif args.command == "snapshot":
+        print(snapshot_report(args.snapshots, args.games).to_string(index=False))
+    elif args.command == "startup":
+        with pd.option_context("display.max_colwidth", None):
+            print(startup_report(args.modules).to_string(index=False))
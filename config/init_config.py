@@ -16,8 +16,55 @@ class InitConfig:
         self.number_to_breed = 10
         # Standard deviation of Gaussian noise added during breeding algorithm
         self.mutation_rate = 0.2
+        # How each generation is made from the last (ai/optimizers.py): "ga"
+        # (breeding above), "openai-es" or "sep-cma-es"
+        self.optimizer = "ga"
+        # Initial standard deviation of the evolution strategies' samples
+        self.es_sigma = 0.1
+        # Step size of the openai-es mean update
+        self.es_learning_rate = 0.03
         # Take average of this many games to select best players
         self.num_games_to_play = 1
+        # Processes used to evaluate players locally.  None = enough to fill
+        # every core with eval_threads threads each
+        self.eval_processes = None
+        # BLAS and tensorflow threads allowed per evaluation process
+        self.eval_threads = 1
+        # Pin each evaluation process to its own eval_threads cores
+        self.pin_eval_processes = False
+        # Where generations are saved
+        self.data_dir = "data"
+        # Save generations on a background thread while training continues
+        self.async_checkpoint = True
+        # Generations allowed to wait for the background thread at once
+        self.max_pending_checkpoints = 2
+        # Clear the screen and print progress while training
+        self.verbose = True
+
+        # Related to island training (ai/islands.py):
+        # Number of independent sub-populations, each run by its own process
+        # with its share of the evaluation processes
+        self.num_islands = 4
+        # Send migrants to the next island every this many generations
+        self.migration_interval = 5
+        # Number of top players sent each time
+        self.num_migrants = 2
+
+        # Related to evaluating players on other machines:
+        # (host, port) to listen on for remote workers.  None = local pool only
+        self.coordinator_address = None
+        # Number of games handed to a worker at a time
+        self.eval_batch_size = 20
+        # Seconds to wait on a batch before assuming the worker is dead
+        self.worker_timeout = 300.0
+        # Give up on a batch after this many failed handoffs
+        self.max_batch_attempts = 3
+
+        # Related to serving trained players (ai/server.py):
+        # Seconds to wait for more requests before running a batch
+        self.max_batch_latency = 0.002
+        # Never run more than this many requests in one forward pass
+        self.max_batch_size = 256
 
         # Related to halting the game:
         # This many frames with no score = kill
@@ -26,14 +73,43 @@ class InitConfig:
         self.extra_time_per_score = 100
         # Overall max frames
         self.max_time_allowed = 3000
+        # Always move in the most likely direction instead of sampling one
+        self.greedy_policy = False
+        # End the game as soon as the snake repeats a state since it last
+        # scored.  Only valid with greedy_policy, where that means it would
+        # loop until it runs out of time.
+        self.detect_cycles = False
+        # How to score a game ended by detect_cycles: "full" credits the
+        # frames it would have looped for (same fitness as playing it out),
+        # "truncate" only counts frames actually played.  Games played without
+        # a time limit (e.g. demo.py) always truncate.
+        self.cycle_fitness = "full"
 
         # How big should the game be?
         self.board_size = 30
+        # How the game stores its board: "array" (GameState) or "bitboard"
+        # (BitboardGameState).  Both play identical games.
+        self.game_backend = "array"
 
         # The neural network will have an input layer of size 24, output layer
         # of size 4, and num_hidden_layers input layers of size hidden_layer_size
         self.num_hidden_layers = 2
         self.hidden_layer_size = 18
+        # Remember the network's output for this many distinct inputs per
+        # player, so repeated situations skip the forward pass.  0 = off
+        self.policy_cache_size = 0
+        # SearchPlayer (ai/search_player.py) tries each move and follows it
+        # with this many frames of the network's greedy policy
+        self.search_depth = 10
+
+    def get_config(self) -> dict:
+        """Returns: the user configurable values above, e.g. to hand to a child
+        process."""
+        return {k: getattr(self, k) for k in vars(InitConfig())}
+
+    def set_config(self, config: dict) -> None:
+        for k, v in config.items():
+            setattr(self, k, v)
 
     def fitness_function(self, score: int, duration: int) -> float:
         # This is the fitness function for the selection algorithm.
@@ -0,0 +1,11 @@
+import sys
+
+from ai.cluster import run_worker
+from ai.evaluation import eval_iter
+
+if __name__ == "__main__":
+    # Usage: ./eval_worker.py HOST PORT
+    host, port = sys.argv[1], int(sys.argv[2])
+
+    run_worker(host, port, eval_iter)
+    print("Coordinator shut down.")
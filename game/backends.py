@@ -0,0 +1,20 @@
+from typing import Optional
+
+from config.init_config import InitConfig
+from game.bitboard_game_state import BitboardGameState
+from game.game_state import GameState
+
+GAME_BACKENDS = {"array": GameState, "bitboard": BitboardGameState}
+
+
+def make_game_state(seed: int = None, backend: Optional[str] = None) -> GameState:
+    """
+    Expects: RNG seed and the name of a backend in GAME_BACKENDS.
+    Returns: new game using that backend (InitConfig.game_backend by default).
+    """
+    if backend is None:
+        backend = InitConfig().game_backend
+    if backend not in GAME_BACKENDS:
+        raise ValueError(f"Unknown game backend {backend!r}.")
+
+    return GAME_BACKENDS[backend](seed=seed)
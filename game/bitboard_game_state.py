@@ -0,0 +1,196 @@
+from collections import deque
+
+import numpy as np
+
+from game.game_state import GameSnapshot, GameState
+
+# The eight directions the player looks in, as (dy, dx).
+DIRECTIONS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
+# board_size -> ({(dy, dx): [ray mask for each cell]}, {(dy, dx): [ray length]})
+_RAY_CACHE = {}
+
+
+def get_ray_masks(board_size: int) -> tuple[dict, dict]:
+    """
+    Returns: for each direction, a list indexed by cell (r * board_size + c)
+    of the bitboard of cells seen looking that way from the cell (not
+    including the cell itself), along with the number of such cells.
+    """
+    if board_size not in _RAY_CACHE:
+        masks, lengths = {}, {}
+        for dy, dx in DIRECTIONS:
+            masks[dy, dx], lengths[dy, dx] = [], []
+            for r in range(board_size):
+                for c in range(board_size):
+                    mask, length = 0, 0
+                    y, x = r + dy, c + dx
+                    while 0 <= y < board_size and 0 <= x < board_size:
+                        mask |= 1 << (y * board_size + x)
+                        length += 1
+                        y, x = y + dy, x + dx
+                    masks[dy, dx].append(mask)
+                    lengths[dy, dx].append(length)
+        _RAY_CACHE[board_size] = (masks, lengths)
+
+    return _RAY_CACHE[board_size]
+
+
+class BitboardSnapshot(GameSnapshot):
+    """GameSnapshot for BitboardGameState, which has no board array to copy."""
+
+    def __init__(self, board_size: int) -> None:
+        super().__init__(0)
+        self.board_size = board_size
+
+        self.body = deque()
+        self.body_bits = 0
+        self.prize_bits = 0
+
+
+class BitboardGameState(GameState):
+    """
+    Drop-in replacement for GameState that keeps the snake and the prize as
+    bitboards (python ints with one bit per cell, numbered r * board_size + c)
+    instead of a float array of body ages.  The order of the body is kept in a
+    deque so the tail can be dropped at the same frame GameState would.  Given
+    the same seed and moves, it plays out exactly the same game.
+    """
+
+    def _init_board(self) -> None:
+        self._ray_masks, self._ray_lengths = get_ray_masks(self.board_size)
+        self._row_mask = (1 << self.board_size) - 1
+
+        # Body cells from tail to head, as (cell, duration when placed).
+        self.body = deque()
+        self.body_bits = 0
+        self.prize_bits = 1 << self._cell(self.prize_loc)
+
+        # GameState draws the prize over the head if they start on the same
+        # cell, which means that cell never counts as body.
+        if self.prize_bits != 1 << self._cell(self.head_loc):
+            self._add_body_cell(self._cell(self.head_loc))
+
+    @property
+    def board(self) -> np.ndarray:
+        """The board as GameState would have it.  Slow, only for drawing."""
+        board = np.zeros((self.board_size, self.board_size))
+        for cell, placed in self.body:
+            board[divmod(cell, self.board_size)] = self.duration - placed + 1
+        board[self.prize_loc[0], self.prize_loc[1]] = -1
+        return board
+
+    def update(self, new_direction: np.ndarray) -> None:
+        """Direction update (only if valid, i.e., no reversing direction)"""
+        if not all(new_direction == -1 * (self.direction)):
+            self.direction = new_direction
+
+        # Putative next location
+        next_loc = self.head_loc + self.direction
+        nextR, nextC = next_loc
+
+        # Wall detection
+        if (
+            nextC < 0
+            or nextC >= self.board_size
+            or nextR < 0
+            or nextR >= self.board_size
+        ):
+            self.dead = True
+            return
+
+        # Self-collision detection (the tail hasn't moved yet)
+        next_cell = int(nextR) * self.board_size + int(nextC)
+        if (self.body_bits >> next_cell) & 1:
+            self.dead = True
+            return
+
+        # Prize handling
+        if self.prize_bits >> next_cell & 1:
+            self.score += 1
+            self.prize_loc = self._get_new_prize_loc()
+
+        # Update location
+        self.head_loc += self.direction
+        self.duration += 1
+        self._add_body_cell(next_cell)
+
+        # Delete tail cells older than GameState would keep
+        while self.body and self.duration - self.body[0][1] >= self.score + 10:
+            cell, _ = self.body.popleft()
+            self.body_bits &= ~(1 << cell)
+
+        self.prize_bits = 1 << self._cell(self.prize_loc)
+
+    def state_key(self) -> int:
+        """
+        Returns: hash of everything that decides what happens next, apart
+        from score and prize (which can only change together).
+        """
+        return hash(
+            (
+                tuple(self.direction),
+                tuple((cell, self.duration - placed) for cell, placed in self.body),
+            )
+        )
+
+    snapshot_class = BitboardSnapshot
+
+    def _snapshot_board(self, buf: BitboardSnapshot) -> None:
+        # Bitboards are immutable ints, so only the deque needs copying.
+        buf.body.clear()
+        buf.body.extend(self.body)
+        buf.body_bits = self.body_bits
+        buf.prize_bits = self.prize_bits
+
+    def _restore_board(self, buf: BitboardSnapshot) -> None:
+        self.body.clear()
+        self.body.extend(buf.body)
+        self.body_bits = buf.body_bits
+        self.prize_bits = buf.prize_bits
+
+    def _add_body_cell(self, cell: int) -> None:
+        self.body.append((cell, self.duration))
+        self.body_bits |= 1 << cell
+
+    def _cell(self, loc: np.ndarray) -> int:
+        return int(loc[0]) * self.board_size + int(loc[1])
+
+    def _get_new_prize_loc(self) -> np.ndarray:
+        """
+        Pick the same free cell GameState would: the i'th empty cell in row
+        major order, where i is drawn uniformly from the number of empty cells.
+        """
+        self.save_rng()
+        occupied = self.body_bits | self.prize_bits
+        num_free = self.board_size**2 - occupied.bit_count()
+        i = np.random.choice(range(num_free))
+
+        for r in range(self.board_size):
+            row = (occupied >> (r * self.board_size)) & self._row_mask
+            num_free_in_row = self.board_size - row.bit_count()
+            if i >= num_free_in_row:
+                i -= num_free_in_row
+                continue
+
+            for c in range(self.board_size):
+                if not (row >> c) & 1:
+                    if i == 0:
+                        return np.array([r, c])
+                    i -= 1
+
+        raise RuntimeError("No free cell for the prize.")
+
+    def look(self, dy: int, dx: int) -> tuple[int, bool, bool]:
+        """
+        Expects: direction written as a pair dy, dx
+        Returns: length of the line of sight in that direction, whether it
+        contains the prize, and whether it contains the snake's body.
+        """
+        head = self._cell(self.head_loc)
+        ray = self._ray_masks[dy, dx][head]
+        return (
+            self._ray_lengths[dy, dx][head],
+            bool(self.prize_bits & ray),
+            bool(self.body_bits & ray),
+        )
@@ -5,6 +5,40 @@ import numpy as np
 from config.init_config import InitConfig
 
 
+class RngRecord:
+    """
+    The global RNG state at a snapshot, filled in lazily: just before the
+    first draw from the RNG after the snapshot (see GameState.save_rng), or
+    when the game is restored somewhere else first.  Snapshots taken with no
+    draw in between share one record.
+    """
+
+    __slots__ = ["state"]
+
+    def __init__(self) -> None:
+        # np.random.get_state(), or None if nothing has drawn from it yet.
+        self.state = None
+
+
+class GameSnapshot:
+    """
+    Reusable buffer for GameState.snapshot: everything needed to put a game
+    back exactly as it was, including the global RNG.  Make one with
+    GameState.new_snapshot and reuse it, so taking a snapshot doesn't
+    allocate.
+    """
+
+    def __init__(self, board_size: int) -> None:
+        self.board_size = board_size
+        # head_loc, direction, prize_loc, score, duration, dead, frames_skipped
+        self.values = np.zeros(10, dtype=np.int64)
+        self.board = np.zeros((board_size, board_size))
+
+        # Game the snapshot was last taken of, and its RNG state then.
+        self.game = None
+        self.rng = None
+
+
 class GameState(InitConfig):
     """
     This class is responsible for holding the state of the game at any given
@@ -26,7 +60,19 @@ class GameState(InitConfig):
         self.score = 0
         self.duration = 0  # Keep track of how long the game has lasted
         self.dead = False
+        # Frames not simulated because the player was caught in a loop
+        self.frames_skipped = 0
+        # restore() writes the direction here rather than into whatever array
+        # update() was last given, which belongs to the caller.
+        self._restored_direction = np.zeros(2, dtype=np.int64)
+        # RNG record of the point the game was last snapshot or restored at.
+        # Only ever one, so the game never keeps its snapshots alive.
+        self._rng_record = None
+
+        self._init_board()
 
+    def _init_board(self) -> None:
+        """Set up however this class stores the board, for the first frame."""
         # The board will be drawn from this array. Positive values
         # are the snake's body, and negative values are the prizes.
         # At each update, all positive values greater than
@@ -81,7 +127,95 @@ class GameState(InitConfig):
         # Add prize cell
         self.board[self.prize_loc[0], self.prize_loc[1]] = -1
 
+    def state_key(self) -> int:
+        """
+        Returns: hash of everything that decides what happens next, apart
+        from score and prize (which can only change together).
+        """
+        return hash((tuple(self.head_loc), tuple(self.direction), self.board.tobytes()))
+
+    ###########################################################################
+    # Snapshots, for players that search ahead.
+    ###########################################################################
+    snapshot_class = GameSnapshot
+
+    def new_snapshot(self) -> GameSnapshot:
+        return self.snapshot_class(self.board_size)
+
+    def snapshot(self, buf: GameSnapshot = None) -> GameSnapshot:
+        """
+        Copy the game into buf (a new one if None) so restore(buf) can put
+        it back, however many frames are played in between.
+        Returns: buf
+        """
+        if buf is None:
+            buf = self.new_snapshot()
+
+        values = buf.values
+        values[0:2] = self.head_loc
+        values[2:4] = self.direction
+        values[4:6] = self.prize_loc
+        values[6] = self.score
+        values[7] = self.duration
+        values[8] = self.dead
+        values[9] = self.frames_skipped
+
+        # Reading the RNG state costs more than the rest of the snapshot, so
+        # leave it until something draws from it.
+        if self._rng_record is None or self._rng_record.state is not None:
+            self._rng_record = RngRecord()
+        buf.game = self
+        buf.rng = self._rng_record
+
+        self._snapshot_board(buf)
+        return buf
+
+    def restore(self, buf: GameSnapshot) -> None:
+        """
+        Put the game back as it was when buf was taken, including the global
+        RNG if anything has drawn from it since.  Only draws announced with
+        save_rng count, which GameState (placing prizes) and Player (sampling
+        its moves) both do.
+        """
+        values = buf.values
+        self.head_loc[:] = values[0:2]
+        self._restored_direction[:] = values[2:4]
+        self.direction = self._restored_direction
+        self.prize_loc[:] = values[4:6]
+        self.score = int(values[6])
+        self.duration = int(values[7])
+        self.dead = bool(values[8])
+        self.frames_skipped = int(values[9])
+
+        if buf.game is self:
+            if self._rng_record is not buf.rng:
+                # Leaving a point nothing has drawn since, so the RNG is
+                # still as it was there.
+                self.save_rng()
+            if buf.rng.state is not None:
+                np.random.set_state(buf.rng.state)
+            self._rng_record = buf.rng
+
+        self._restore_board(buf)
+
+    def _snapshot_board(self, buf: GameSnapshot) -> None:
+        np.copyto(buf.board, self.board)
+
+    def _restore_board(self, buf: GameSnapshot) -> None:
+        np.copyto(self.board, buf.board)
+
+    def save_rng(self) -> None:
+        """
+        Call before drawing from the global RNG while playing, so restore can
+        undo the draw.  Only reads the RNG state for the first draw after a
+        snapshot, so it costs nothing without one.
+        """
+        record = self._rng_record
+        if record is not None and record.state is None:
+            record.state = np.random.get_state()
+
     def _get_new_prize_loc(self) -> np.ndarray:
+        self.save_rng()
         X, Y = np.where(self.board == 0)
         i = np.random.choice(range(len(X)))
         return np.array([X[i], Y[i]])
@@ -155,3 +289,12 @@ class GameState(InitConfig):
             ]
 
         return self.board[rs, cs]
+
+    def look(self, dy: int, dx: int) -> tuple[int, bool, bool]:
+        """
+        Expects: direction written as a pair dy, dx
+        Returns: length of the line of sight in that direction, whether it
+        contains the prize, and whether it contains the snake's body.
+        """
+        LOS = self.get_line_of_sight(dy, dx)
+        return len(LOS), bool(np.any(LOS == -1)), bool(np.any(LOS > 0))
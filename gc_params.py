@@ -0,0 +1,14 @@
+import argparse
+
+from ai.param_store import collect_garbage
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Delete saved weights that no generation refers to any more "
+        "(e.g. after deleting old generations).  Don't run while training."
+    )
+    parser.add_argument("data_dir", nargs="?", default="data")
+    args = parser.parse_args()
+
+    for root, deleted in collect_garbage(args.data_dir).items():
+        print(f"{root}: deleted {len(deleted)} unreferenced weights.")
@@ -0,0 +1,24 @@
+import argparse
+
+from ai.results_store import ResultsStore
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the training history.")
+    parser.add_argument("--root", default=None, help="Defaults to data/results.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("trend", help="Best and mean fitness per generation.")
+    leader_board = commands.add_parser("leaderboard", help="Top players of a gen.")
+    leader_board.add_argument("generation", type=int)
+    lineage = commands.add_parser("lineage", help="Ancestry of one player.")
+    lineage.add_argument("generation", type=int)
+    lineage.add_argument("player", type=int)
+
+    args = parser.parse_args()
+    store = ResultsStore(args.root)
+    if args.command == "trend":
+        print(store.get_trend().to_string(index=False))
+    elif args.command == "leaderboard":
+        print(store.get_leader_board(args.generation))
+    elif args.command == "lineage":
+        print(store.get_lineage(args.generation, args.player).to_string(index=False))
@@ -0,0 +1,27 @@
+import asyncio
+import sys
+
+from ai.server import InferenceServer
+
+
+async def main(port: int, specs: list[str]) -> None:
+    server = InferenceServer()
+    for spec in specs:
+        name, load_loc = spec.split("=", 1)
+        server.load_player(name, load_loc)
+
+    tcp_server = await server.start("0.0.0.0", port)
+    print(f"Serving {', '.join(server.players)} on port {port}.")
+
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(server.report())
+    finally:
+        await server.stop(tcp_server)
+
+
+if __name__ == "__main__":
+    # Usage: ./serve.py PORT NAME=data/params/3f/3f9c...npz [NAME=... ...]
+    # (data/gen0100/manifest.csv lists the file of each player)
+    asyncio.run(main(int(sys.argv[1]), sys.argv[2:]))
@@ -0,0 +1,23 @@
+import pytest
+
+# My stuff
+from ai.generation import Generation
+
+
+@pytest.fixture
+def make_generation(tmp_path):
+    """
+    Returns: factory for small, quiet generations that evaluate in this
+    process and save under tmp_path.  Keyword arguments override the config.
+    """
+
+    def make(generation_size=6, **config):
+        gen = Generation(generation_size=generation_size)
+        gen.number_to_breed = 2
+        gen.eval_processes = 1
+        gen.verbose = False
+        gen.data_dir = str(tmp_path)
+        gen.set_config(config)
+        return gen
+
+    return make
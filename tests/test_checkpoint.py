@@ -0,0 +1,45 @@
+import os
+
+import numpy as np
+
+
+def test_async_matches_sync(make_generation):
+    gen = make_generation(generation_size=4)
+    gen.load_latest_gen()
+    gen.train_iter(3)
+    gen.flush_checkpoints()
+
+    assert sorted(os.listdir(gen.data_dir)) == [
+        "gen0001",
+        "gen0002",
+        "gen0003",
+        "gen0004",
+        "params",
+        "results",
+    ]
+    assert list(gen.get_results_store().generations()) == [1, 2, 3, 4]
+
+    # The last save holds the players as they were when it was submitted.
+    gen2 = make_generation(generation_size=4)
+    gen2.load_latest_gen()
+    assert gen2.gen_number == 4
+    for P, Q in zip(gen.players, gen2.players):
+        for p, q in zip(P.model.get_weights(), Q.model.get_weights()):
+            assert np.all(p == q)
+
+
+def test_resave_replaces(make_generation, tmp_path):
+    gen = make_generation(generation_size=4, async_checkpoint=False)
+    gen.spawn_random()
+    gen.eval_players()
+    gen.save_latest_gen()
+
+    # Saving the same generation again swaps the directory in whole, and
+    # replaces its rows in the results store.
+    gen.summary["score"] = 99
+    gen.save_latest_gen()
+
+    gen.load_gen(1)
+    assert np.all(gen.summary["score"] == 99)
+    assert np.all(gen.get_results_store().get_games(1)["score"] == 99)
+    assert [f for f in os.listdir(tmp_path) if f.startswith(".")] == []
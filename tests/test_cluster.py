@@ -0,0 +1,96 @@
+import multiprocessing as mp
+import os
+import threading
+import time
+
+# My stuff
+from ai.cluster import Coordinator, run_worker
+
+
+def _square(task):
+    return task * task
+
+
+def _die_on_seven(task):
+    # Stands in for a node that crashes halfway through a batch.
+    if task == 7:
+        os._exit(1)
+    return task * task
+
+
+_calls = 0
+
+
+def _slow_first_batch(task):
+    # Stands in for a node that hangs past worker_timeout once.
+    global _calls
+    _calls += 1
+    if _calls == 1:
+        time.sleep(3)
+    return task * task
+
+
+def _start_workers(address, evaluate, num_workers):
+    ctx = mp.get_context("spawn")
+    workers = [
+        ctx.Process(target=run_worker, args=(*address, evaluate, 30))
+        for _ in range(num_workers)
+    ]
+    for w in workers:
+        w.start()
+    return workers
+
+
+def test_localhost_workers():
+    C = Coordinator("127.0.0.1", 0)
+    C.eval_batch_size = 3
+    workers = _start_workers(C.address, _square, 3)
+    assert C.wait_for_workers(3, timeout=30)
+
+    # Workers persist across several rounds of evaluation.
+    for _ in range(2):
+        assert C.evaluate(list(range(20))) == [i * i for i in range(20)]
+
+    C.close()
+    for w in workers:
+        w.join(timeout=30)
+        assert w.exitcode == 0
+
+
+def test_dead_worker_reassignment():
+    C = Coordinator("127.0.0.1", 0)
+    C.eval_batch_size = 4
+    C.worker_timeout = 10.0
+    flaky = _start_workers(C.address, _die_on_seven, 1)
+
+    # Let the flaky worker pick up the whole queue, then bring in a healthy one.
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.extend(C.evaluate(list(range(12))))
+    )
+    thread.start()
+    flaky[0].join(timeout=30)
+    healthy = _start_workers(C.address, _square, 1)
+    thread.join(timeout=60)
+
+    assert results == [i * i for i in range(12)]
+
+    C.close()
+    healthy[0].join(timeout=30)
+
+
+def test_timed_out_worker_reconnects():
+    C = Coordinator("127.0.0.1", 0)
+    C.eval_batch_size = 4
+    C.worker_timeout = 1.0
+    workers = _start_workers(C.address, _slow_first_batch, 1)
+    assert C.wait_for_workers(1, timeout=30)
+
+    # The coordinator drops the worker on its slow batch; the worker comes
+    # back and finishes the job instead of crashing.
+    assert C.evaluate(list(range(8))) == [i * i for i in range(8)]
+    assert C.num_workers == 1
+
+    C.close()
+    workers[0].join(timeout=30)
+    assert workers[0].exitcode == 0
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+# My stuff
+from ai.islands import IslandModel
+from ai.player import Player
+
+
+def test_immigrants_replace_weakest_breeders(make_generation):
+    gen = make_generation(number_to_breed=3)
+    gen.spawn_random()
+    gen.eval_players()
+
+    leader_board = gen.get_leader_board()
+    best = gen.players[int(leader_board["model"][0])]
+    immigrant = Player()
+    gen.advance_next_gen([immigrant])
+
+    # Breeders persist at the front of the next generation.
+    for w, v in zip(gen.players[0].model.get_weights(), best.model.get_weights()):
+        assert np.array_equal(w, v)
+    for w, v in zip(gen.players[2].model.get_weights(), immigrant.model.get_weights()):
+        assert np.array_equal(w, v)
+    assert gen.parents[2] == (-1, -1)
+
+
+def test_islands():
+    islands = IslandModel(num_islands=2)
+    islands.generation_size = 8
+    islands.number_to_breed = 2
+    islands.migration_interval = 1
+    islands.num_migrants = 1
+    islands.run(num_gens=2, save=False)
+
+    for island in range(2):
+        summary = islands.get_island_summary(island)
+        assert list(summary["generation"]) == [2, 3]
+
+    leader_board = islands.get_leader_board()
+    assert len(leader_board) == 2
+    assert np.all(np.diff(leader_board["avg_fitness"]) <= 0)
+    assert islands.get_best_player().model.get_weights()[0].shape == (24, 24)
+
+
+def test_large_migrations_finish():
+    # Migrants bigger than a pipe buffer are left over at the end; run must
+    # still return.
+    islands = IslandModel(num_islands=2)
+    islands.generation_size = 40
+    islands.number_to_breed = 14
+    islands.num_migrants = 14
+    islands.migration_interval = 1
+    islands.run(num_gens=2, save=False)
+
+    assert len(islands.get_leader_board()) == 14
+
+
+def test_failed_island_raises():
+    islands = IslandModel(num_islands=2)
+    islands.generation_size = 8
+    islands.number_to_breed = 2
+    islands.optimizer = "nope"
+
+    with pytest.raises(RuntimeError, match="Unknown optimizer 'nope'"):
+        islands.run(num_gens=2, save=False)
@@ -0,0 +1,43 @@
+import subprocess
+import sys
+
+import numpy as np
+
+# My stuff
+from ai.network import DenseNetwork
+from ai.player import Player
+
+
+def test_matches_keras():
+    N = DenseNetwork([24, 24, 18, 18, 4])
+    inputs = np.random.uniform(size=(50, 24))
+
+    expected = N.to_keras().predict_on_batch(inputs)
+    assert np.allclose(N.predict_on_batch(inputs), expected, atol=1e-6)
+
+
+def test_creating_network_leaves_global_rng_alone():
+    np.random.seed(1234)
+    a = np.random.randint(1000)
+    np.random.seed(1234)
+    Player()
+    assert np.random.randint(1000) == a
+
+
+def test_npz_save_and_load(tmp_path):
+    P = Player()
+    Q = Player()
+
+    P.save_weights(str(tmp_path / "player.npz"))
+    Q.load_weights(str(tmp_path / "player.npz"))
+
+    for p, q in zip(P.model.get_weights(), Q.model.get_weights()):
+        assert np.all(p == q)
+
+
+def test_no_tensorflow_on_import():
+    code = (
+        "import sys, ai.evaluation, ai.generation, game.backends;"
+        "assert 'tensorflow' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+# My stuff
+from ai.network import flatten_weights, unflatten_weights
+from ai.optimizers import OPTIMIZERS, GeneticOptimizer, make_optimizer
+from ai.player import Player
+
+
+def test_flatten_round_trip():
+    weights = Player().model.get_weights()
+    shapes = [w.shape for w in weights]
+
+    for w, v in zip(weights, unflatten_weights(flatten_weights(weights), shapes)):
+        assert np.array_equal(w, v)
+
+
+def test_ga_children_come_from_two_breeders():
+    shapes = [(3, 2), (2,)]
+    optimizer = GeneticOptimizer(shapes, population_size=10)
+    optimizer.number_to_breed = 3
+    optimizer.mutation_rate = 0
+
+    population = np.arange(10)[:, None] * np.ones((10, 8))
+    fitness = np.arange(10.0)
+    optimizer.tell(population, fitness)
+    new_population = optimizer.ask()
+
+    assert new_population.shape == (10, 8)
+    assert np.array_equal(new_population[:3], population[[9, 8, 7]])
+    for row, (a, b) in zip(new_population[3:], optimizer.parents[3:]):
+        assert a != b and {a, b} <= {7, 8, 9}
+        # Without mutation every gene comes from one of the two parents.
+        assert np.all((row == a) | (row == b))
+
+
+@pytest.mark.parametrize("name", ["openai-es", "sep-cma-es"])
+def test_strategies_climb_a_quadratic(name):
+    np.random.seed(0)
+    target = np.linspace(-1, 1, 20)
+    config = {"es_sigma": 0.3, "es_learning_rate": 0.1}
+    optimizer = make_optimizer(name, [(20,)], population_size=20, config=config)
+
+    population = np.random.normal(size=(20, 20))
+    start = -np.sum((population - target) ** 2, axis=1).max()
+    for _ in range(200):
+        fitness = -np.sum((population - target) ** 2, axis=1)
+        optimizer.tell(population, fitness)
+        population = optimizer.ask()
+
+    assert -np.sum((optimizer.mean - target) ** 2) > start / 10
+
+
+@pytest.mark.parametrize("name", ["openai-es", "sep-cma-es"])
+def test_strategies_move_to_better_immigrants(name):
+    np.random.seed(0)
+    target = np.linspace(-1, 1, 20)
+    optimizer = make_optimizer(name, [(20,)], population_size=10)
+
+    population = np.random.normal(size=(10, 20))
+    optimizer.tell(
+        population, -np.sum((population - target) ** 2, axis=1), target[None]
+    )
+    population = optimizer.ask()
+    assert optimizer.num_immigrants == 1
+    assert np.array_equal(population[-1], target)
+
+    # The immigrant beats every sample, so the mean moves to it.
+    optimizer.tell(population, -np.sum((population - target) ** 2, axis=1))
+    assert np.array_equal(optimizer.mean, target)
+    optimizer.ask()
+    assert optimizer.num_immigrants == 0
+
+
+@pytest.mark.parametrize("name", sorted(OPTIMIZERS))
+def test_generation_uses_optimizer(name, make_generation):
+    gen = make_generation(optimizer=name)
+    gen.spawn_random()
+    gen.eval_players()
+
+    for gen_number in [2, 3]:
+        gen.advance_next_gen()
+        gen.eval_players()
+        assert gen.gen_number == gen_number
+        assert len(gen.players) == 6
+        assert len(gen.parents) == 6
+
+
+def test_cma_starts_at_configured_sigma(make_generation):
+    gen = make_generation(optimizer="sep-cma-es", es_sigma=0.5)
+    gen.spawn_random()
+
+    assert gen.get_optimizer().sigma == 0.5
+
+
+@pytest.mark.parametrize("name", ["openai-es", "sep-cma-es"])
+def test_resume_keeps_optimizer_state(name, make_generation):
+    gen = make_generation(optimizer=name, async_checkpoint=False)
+    gen.spawn_random()
+    gen.eval_players()
+    gen.save_latest_gen()
+    gen.train_iter(2)
+    state = gen.get_optimizer().get_state()
+
+    resumed = make_generation(optimizer=name, async_checkpoint=False)
+    resumed.load_latest_gen()
+    assert resumed.gen_number == 3
+    for k, v in state.items():
+        assert np.array_equal(resumed.get_optimizer().get_state()[k], v)
+
+    # Both carry on identically from the same random state.
+    np.random.seed(1)
+    gen.advance_next_gen()
+    np.random.seed(1)
+    resumed.advance_next_gen()
+    for P, Q in zip(gen.players, resumed.players):
+        for w, v in zip(P.model.get_weights(), Q.model.get_weights()):
+            assert np.allclose(w, v)
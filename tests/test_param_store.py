@@ -0,0 +1,59 @@
+import os
+import shutil
+
+import numpy as np
+
+# My stuff
+from ai.param_store import ParamStore, collect_garbage
+
+
+def _trained_generation(make_generation, num_gens):
+    gen = make_generation()
+    gen.load_latest_gen()
+    gen.train_iter(num_gens)
+    gen.flush_checkpoints()
+    return gen
+
+
+def test_breeders_stored_once(make_generation):
+    gen = _trained_generation(make_generation, 3)
+
+    # 6 players to start, then 4 new children per generation.
+    assert len(gen.get_param_store().keys()) == 6 + 3 * 4
+
+
+def test_load_reuses_resident_weights(make_generation):
+    gen = _trained_generation(make_generation, 1)
+    store = gen.get_param_store()
+    expected = [P.model.get_weights() for P in gen.players]
+
+    gen.load_gen(2)
+    assert store.blobs_read == 0
+    for P, weights in zip(gen.players, expected):
+        for p, w in zip(P.model.get_weights(), weights):
+            assert np.all(p == w)
+
+    # Generation 1 shares only the breeders with generation 2.
+    gen.load_gen(1)
+    assert store.blobs_read == 6 - 2
+
+    # A fresh store has nothing in memory.
+    fresh = ParamStore(store.root)
+    gen._param_store = fresh
+    gen.load_gen(2)
+    assert fresh.blobs_read == 6
+
+
+def test_collect_garbage(make_generation, tmp_path):
+    gen = _trained_generation(make_generation, 2)
+    store = gen.get_param_store()
+    kept = set(store.keys())
+
+    shutil.rmtree(os.path.join(tmp_path, "gen0001"))
+    shutil.rmtree(os.path.join(tmp_path, "gen0002"))
+    deleted = collect_garbage(str(tmp_path))[store.root]
+
+    assert len(deleted) == 6 + 4 - 2
+    assert store.keys() == kept - set(deleted)
+    gen.load_gen(3)
+    assert len(gen.players) == 6
@@ -3,6 +3,8 @@ import numpy as np
 # My stuff
 from ai.player import Player
 from config.init_config import InitConfig
+from game.bitboard_game_state import BitboardGameState
+from game.game_state import GameState
 
 def test_cross_singleton():
     arr1 = np.zeros((1, 1))
@@ -108,3 +110,80 @@ def test_breed():
 
     for p, q, r in zip(P_weights, Q_weights, R_weights):
         assert np.all((r == p) | (r == q))
+
+
+class LoopingPlayer(Player):
+    """Drives clockwise around a 4x4 square, forever."""
+
+    def __init__(self):
+        super().__init__()
+        self.greedy_policy = True
+
+    def play_game(self, game_state, **kwargs):
+        self._game_state = game_state
+        super().play_game(game_state, **kwargs)
+
+    def decide_direction(self, parsed_game_state):
+        r, c = self._game_state.head_loc
+        if c == 15 and r > 10:
+            return np.array([-1, 0])
+        elif r == 10 and c < 18:
+            return np.array([0, 1])
+        elif c == 18 and r < 13:
+            return np.array([1, 0])
+        return np.array([0, -1])
+
+
+def test_cycle_detection():
+    for P in [Player(), LoopingPlayer()]:
+        P.greedy_policy = True
+        for seed in range(10):
+            for backend in [GameState, BitboardGameState]:
+                P.detect_cycles = False
+                G = backend(seed)
+                P.play_game(G)
+
+                # Same result as playing out the loop, just faster.
+                P.detect_cycles = True
+                H = backend(seed)
+                P.play_game(H)
+                assert (G.score, G.duration, G.dead) == (H.score, H.duration, H.dead)
+
+                P.cycle_fitness = "truncate"
+                T = backend(seed)
+                P.play_game(T)
+                assert T.duration + T.frames_skipped == G.duration
+                P.cycle_fitness = "full"
+
+                if isinstance(P, LoopingPlayer):
+                    assert H.frames_skipped > 0
+
+                    # With no time limit the loop would never end, so the
+                    # game stops where the cycle is found.
+                    U = backend(seed)
+                    P.play_game(U, limit_time=False)
+                    assert (U.duration, U.frames_skipped) == (T.duration, 0)
+                    assert not U.dead
+
+
+def test_policy_cache():
+    P = Player()
+    P.greedy_policy = True
+    G = GameState(1234)
+    P.play_game(G)
+
+    P.policy_cache_size = 8
+    H = GameState(1234)
+    P.play_game(H)
+
+    # Same game, with some of it from the cache.
+    assert (G.score, G.duration) == (H.score, H.duration)
+    assert P.cache_misses > 0
+    assert P.cache_hits + P.cache_misses == H.duration + int(H.dead)
+    assert len(P._policy_cache) <= 8
+
+    # New weights mean old answers are no good.
+    P.model.set_weights(Player().model.get_weights())
+    inputs = P.parse_game_state(GameState(1))
+    assert np.all(P._predict(inputs) == P.model.predict_on_batch(inputs).flatten())
+    assert len(P._policy_cache) == 1
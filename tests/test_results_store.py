@@ -0,0 +1,125 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# My stuff
+from ai.results_store import ResultsStore
+
+
+def _fake_summary(gen_number, num_players, num_games):
+    rng = np.random.RandomState(gen_number)
+    rows = []
+    for i in range(num_players):
+        for seed in rng.randint(1000, 9999, size=num_games):
+            score, duration = rng.randint(0, 10), rng.randint(1, 500)
+            rows.append((i, seed, score, duration, np.log(1 + duration) + score))
+    return pd.DataFrame(rows, columns=["model", "seed", "score", "duration", "fitness"])
+
+
+def test_queries_match_summaries(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    summaries = {g: _fake_summary(g, 20, 3) for g in range(1, 6)}
+    for g, summary in summaries.items():
+        parents = [(i % 4, (i + 1) % 4) for i in range(20)]
+        store.append_generation(g, summary, parents)
+
+    assert list(store.generations()) == [1, 2, 3, 4, 5]
+
+    trend = store.get_trend()
+    for g, summary in summaries.items():
+        by_player = summary.groupby("model")["fitness"].mean()
+        row = trend[trend["generation"] == g].iloc[0]
+        assert np.isclose(row["best_fitness"], by_player.max())
+        assert np.isclose(row["mean_fitness"], summary["fitness"].mean())
+        assert row["max_score"] == summary["score"].max()
+
+        leader_board = store.get_leader_board(g)
+        assert list(leader_board["model"]) == list(
+            by_player.sort_values(ascending=False).index[: store.number_to_breed]
+        )
+
+    lineage = store.get_lineage(5, 7)
+    assert list(lineage["generation"]) == [5, 4, 3, 2, 1]
+    assert list(lineage["player"]) == [7, 3, 3, 3, 3]
+
+
+def test_append_only(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    store.append_generation(1, _fake_summary(1, 5, 1))
+
+    # Junk from a half finished append is dropped by the next one.
+    with open(store._column_path("games", "score"), "ab") as f:
+        f.write(b"junk")
+    store.append_generation(2, _fake_summary(2, 5, 1))
+    assert list(store.get_games(2)["score"]) == list(_fake_summary(2, 5, 1)["score"])
+
+
+def test_restore_replaces_later_generations(tmp_path):
+    store = ResultsStore(str(tmp_path))
+    for g in range(1, 5):
+        store.append_generation(g, _fake_summary(g, 5, 2))
+
+    # Training again from generation 2 rewrites history from there on.
+    replacement = _fake_summary(10, 3, 1)
+    store.append_generation(2, replacement)
+    assert list(store.generations()) == [1, 2]
+    assert list(store.get_games(1)["score"]) == list(
+        _fake_summary(1, 5, 2).sort_values(["model", "seed"], kind="stable")["score"]
+    )
+    assert len(store.get_games(2)) == 3
+    assert len(store.get_players(2)) == 3
+
+    store.append_generation(3, _fake_summary(3, 5, 2))
+    assert list(store.generations()) == [1, 2, 3]
+    assert len(store.get_games(3)) == 10
+
+
+def test_generation_records_parents(make_generation):
+    gen = make_generation()
+    gen.load_latest_gen()
+    gen.train_iter(2)
+    gen.flush_checkpoints()
+
+    store = gen.get_results_store()
+    assert list(store.generations()) == [1, 2, 3]
+
+    players = store.get_players(3)
+    leaders = list(store.get_leader_board(2)["model"][:2])
+    # Breeders are carried over first, everyone else has two breeder parents.
+    assert list(players["parent1"][:2]) == leaders
+    assert set(players["parent1"][2:]) <= set(leaders)
+    assert np.all(players["parent2"][:2] == -1)
+
+
+def test_resume_from_earlier_generation(make_generation, tmp_path):
+    for async_checkpoint in [False, True]:
+        gen = make_generation(
+            generation_size=4,
+            async_checkpoint=async_checkpoint,
+            data_dir=str(tmp_path / str(async_checkpoint)),
+        )
+        gen.load_latest_gen()
+        gen.train_iter(4)
+
+        gen.load_gen(2)
+        gen.train_iter(1)
+        gen.flush_checkpoints()
+
+        # Generations 4 and 5 came from the old generation 3, so they're gone
+        # from disk as well as from the store.
+        store = gen.get_results_store()
+        assert list(store.generations()) == [1, 2, 3]
+        assert sorted(f for f in os.listdir(gen.data_dir) if f.startswith("gen")) == [
+            "gen0001",
+            "gen0002",
+            "gen0003",
+        ]
+        assert np.allclose(
+            store.get_leader_board(3)["avg_fitness"][:2],
+            gen.get_leader_board()["avg_fitness"],
+        )
+        assert len(store.get_lineage(3, 0)) == 3
+
+        gen.load_latest_gen()
+        assert gen.gen_number == 3
@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import numpy as np
+
+# My stuff
+from ai.player import Player
+from ai.server import InferenceServer
+from game.game_state import GameState
+
+
+async def _query(address, requests):
+    reader, writer = await asyncio.open_connection(*address)
+    answers = []
+    for request in requests:
+        writer.write((json.dumps(request) + "\n").encode())
+        await writer.drain()
+        answers.append(json.loads(await reader.readline()))
+    writer.close()
+    return answers
+
+
+def test_batched_predictions():
+    P = Player()
+    features = [
+        P.parse_game_state(GameState(seed=seed)).flatten().tolist()
+        for seed in range(20)
+    ]
+
+    async def run():
+        S = InferenceServer({"best": P})
+        S.max_batch_latency = 0.05
+        server = await S.start()
+
+        # Twenty clients asking at once should share forward passes.
+        answers = await asyncio.gather(
+            *[_query(S.address, [{"model": "best", "features": f}]) for f in features]
+        )
+        (stats,) = await _query(S.address, [{"command": "stats"}])
+        await S.stop(server)
+        return answers, stats
+
+    answers, stats = asyncio.run(run())
+
+    expected = P.model.predict_on_batch(np.array(features))
+    for (answer,), probs in zip(answers, np.asarray(expected)):
+        assert np.allclose(answer["probs"], probs, atol=1e-6)
+
+    assert stats["requests"] == 20
+    assert sum(int(k) * v for k, v in stats["batch_sizes"].items()) == 20
+    assert max(int(k) for k in stats["batch_sizes"]) > 1
+
+
+def test_bad_requests():
+    async def run():
+        S = InferenceServer({"best": Player()})
+        server = await S.start()
+        answers = await _query(
+            S.address,
+            [
+                {"model": "nope", "features": [0] * 24},
+                {"model": "best"},
+                [1, 2],
+                1,
+            ],
+        )
+        await S.stop(server)
+        return answers
+
+    assert all("error" in answer for answer in asyncio.run(run()))
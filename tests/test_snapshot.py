@@ -0,0 +1,150 @@
+import gc
+import weakref
+
+import numpy as np
+import pytest
+
+# My stuff
+from ai.player import Player
+from ai.search_player import SearchPlayer
+from game.backends import make_game_state
+
+MOVES = [np.array([-1, 0]), np.array([1, 0]), np.array([0, -1]), np.array([0, 1])]
+
+
+def _state(G):
+    return (
+        tuple(G.head_loc),
+        tuple(G.direction),
+        tuple(G.prize_loc),
+        G.score,
+        G.duration,
+        G.dead,
+        G.board.tobytes(),
+    )
+
+
+def _plant_prize(G, backend):
+    # Put the prize right ahead of the snake, heading east.
+    G.prize_loc[:] = G.head_loc + MOVES[3]
+    if backend == "bitboard":
+        G.prize_bits = 1 << G._cell(G.prize_loc)
+    else:
+        G.board[tuple(G.prize_loc)] = -1
+
+
+def _same_rng(state):
+    now = np.random.get_state()
+    return np.array_equal(now[1], state[1]) and now[2:] == state[2:]
+
+
+@pytest.mark.parametrize("backend", ["array", "bitboard"])
+def test_restore_replays_identically(backend):
+    G = make_game_state(seed=11, backend=backend)
+    # Circle the middle so the snake has a body.
+    loop = [MOVES[3]] * 3 + [MOVES[1]] * 3 + [MOVES[2]] * 3 + [MOVES[0]] * 3
+    for move in loop:
+        G.update(move)
+
+    buf = G.snapshot()
+    before = _state(G)
+    rng_before = np.random.get_state()
+
+    # Eat a prize planted right ahead, which draws from the RNG, and play on.
+    _plant_prize(G, backend)
+    G.update(MOVES[3])
+    assert G.score == 1
+    moves = np.random.RandomState(0).randint(4, size=200)
+    for k in moves:
+        if G.dead:
+            break
+        G.update(MOVES[k])
+
+    G.restore(buf)
+    assert _state(G) == before
+    assert _same_rng(rng_before)
+
+    # Restoring the same buffer again replays the same game.
+    replays = []
+    for _ in range(2):
+        G.restore(buf)
+        replays.append([])
+        for k in moves:
+            G.update(MOVES[k])
+            replays[-1].append(_state(G))
+            if G.dead:
+                break
+    assert replays[0] == replays[1]
+
+
+@pytest.mark.parametrize("backend", ["array", "bitboard"])
+def test_nested_snapshots(backend):
+    G = make_game_state(seed=3, backend=backend)
+    G.update(MOVES[3])
+
+    # Two snapshots with a prize drawn between them, and one after.
+    outer = G.snapshot()
+    rng_outer = np.random.get_state()
+    _plant_prize(G, backend)
+    G.update(MOVES[3])
+    inner = G.snapshot()
+    rng_inner = np.random.get_state()
+    _plant_prize(G, backend)
+    G.update(MOVES[3])
+    assert G.score == 2
+
+    G.restore(inner)
+    assert G.score == 1 and _same_rng(rng_inner)
+    G.restore(outer)
+    assert G.score == 0 and _same_rng(rng_outer)
+
+    # A snapshot nothing drew after still gets its RNG back after the game
+    # has been restored elsewhere and drawn from it.
+    untouched = G.snapshot()
+    rng_untouched = np.random.get_state()
+    G.restore(inner)
+    _plant_prize(G, backend)
+    G.update(MOVES[3])
+    G.restore(untouched)
+    assert G.score == 0 and _same_rng(rng_untouched)
+
+    # The game doesn't hold on to its snapshots, even before its next prize.
+    ref = weakref.ref(G.snapshot())
+    gc.collect()
+    assert ref() is None
+
+
+@pytest.mark.parametrize("backend", ["array", "bitboard"])
+def test_restore_undoes_sampled_moves(backend):
+    P = Player()
+    P.greedy_policy = False
+    G = make_game_state(seed=7, backend=backend)
+
+    buf = G.snapshot()
+    rng_before = np.random.get_state()
+    for _ in range(5):
+        G.update(P.choose_move(G))
+    assert G.score == 0
+
+    G.restore(buf)
+    assert _same_rng(rng_before)
+
+
+@pytest.mark.parametrize("backend", ["array", "bitboard"])
+def test_search_leaves_game_alone(backend):
+    P = SearchPlayer()
+    P.search_depth = 3
+
+    G = make_game_state(seed=5, backend=backend)
+    moves, states = [], []
+    while not G.dead and G.duration < 200:
+        moves.append(P.choose_move(G))
+        G.update(moves[-1])
+        states.append(_state(G))
+    assert P.frames_searched > 0
+
+    # Both games draw prizes from the global RNG, so replay afterwards.
+    replay = make_game_state(seed=5, backend=backend)
+    for move, expected in zip(moves, states):
+        replay.update(move)
+        assert _state(replay) == expected
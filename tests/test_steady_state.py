@@ -0,0 +1,25 @@
+import numpy as np
+
+# My stuff
+from ai.steady_state import SteadyStateEvolution
+
+
+def test_steady_state():
+    S = SteadyStateEvolution()
+    S.generation_size = 6
+    S.number_to_breed = 2
+    S.eval_processes = 2
+    S.run(num_evals=10)
+
+    assert S.num_evaluated == 10
+    assert len(S.population) == 6
+    assert 0 < S.stats["utilization"] <= 1
+
+    # Population stays ranked best first.
+    fitness = [-f for f, _, _, _ in S.population]
+    assert np.all(np.diff(fitness) <= 0)
+    assert list(S.get_leader_board()["avg_fitness"]) == fitness[:2]
+
+    gen = S.to_generation()
+    assert len(gen.players) == 6
+    assert len(gen.get_leader_board()) == 2
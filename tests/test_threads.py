@@ -0,0 +1,49 @@
+import os
+
+# My stuff
+from ai.threads import (
+    THREAD_ENV_VARS,
+    available_cpus,
+    make_pool,
+    thread_limits,
+    worker_cpus,
+)
+
+
+def _worker_view(_):
+    affinity = (
+        sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else None
+    )
+    return {k: os.environ.get(k) for k in THREAD_ENV_VARS}, affinity
+
+
+def test_pool_workers_are_capped():
+    before = dict(os.environ)
+    with make_pool(2, threads=1, pin=True) as pool:
+        views = pool.map(_worker_view, range(2))
+
+    for env, affinity in views:
+        assert set(env.values()) == {"1"}
+        if affinity is not None:
+            assert len(affinity) == 1 and affinity[0] in available_cpus()
+    # The parent's own environment is left as it was.
+    assert dict(os.environ) == before
+
+
+def test_thread_limits_restores_environment():
+    os.environ["OMP_NUM_THREADS"] = "7"
+    os.environ.pop("MKL_NUM_THREADS", None)
+    with thread_limits(2):
+        assert os.environ["OMP_NUM_THREADS"] == "2"
+        assert os.environ["MKL_NUM_THREADS"] == "2"
+    assert os.environ["OMP_NUM_THREADS"] == "7"
+    assert "MKL_NUM_THREADS" not in os.environ
+    del os.environ["OMP_NUM_THREADS"]
+
+
+def test_every_worker_gets_its_threads_worth_of_cpus():
+    cpus = list(range(6))
+    assert worker_cpus(0, 4, cpus) == [0, 1, 2, 3]
+    # Not a whole block left, so wrap around rather than pin to just 4 and 5.
+    assert worker_cpus(1, 4, cpus) == [4, 5, 0, 1]
+    assert worker_cpus(3, 2, cpus) == [0, 1]
@@ -6,8 +6,15 @@ if __name__ == "__main__":
     num_gens = int(sys.argv[1])
 
     gen = Generation()
+    if len(sys.argv) > 2:
+        # Hand games out to ./eval_worker.py processes instead of a local pool
+        host, port = sys.argv[2].rsplit(":", 1)
+        gen.coordinator_address = (host, int(port))
+
     gen.load_latest_gen()
     gen.train_iter(num_gens)
+    gen.close_coordinator()
+    gen.flush_checkpoints()
 
     print(f"Done training {num_gens} generations.\nFinal Leaderboard:")
     print(gen.get_leader_board())
@@ -0,0 +1,18 @@
+import sys
+
+from ai.islands import IslandModel
+
+if __name__ == "__main__":
+    # Usage: ./train_islands.py NUM_GENS [NUM_ISLANDS]
+    num_gens = int(sys.argv[1])
+    num_islands = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    islands = IslandModel(num_islands)
+    islands.run(num_gens)
+
+    for island in range(islands.num_islands):
+        print(f"Island {island}:")
+        print(islands.get_island_summary(island))
+
+    print(f"Done training {num_gens} generations.\nMerged Leaderboard:")
+    print(islands.get_leader_board())